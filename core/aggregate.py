@@ -0,0 +1,74 @@
+"""
+Aggregates:
+COUNT / SUM / MIN / MAX / AVG over a stream of rows. Each aggregate keeps a small
+partial state [count, sum, min, max], so separate pieces of a table can be
+aggregated on their own (e.g. by parallel scan workers) and merged afterwards.
+An aggregate dict is {"func", "col", "col_index"}; col_index is None for COUNT(*).
+"""
+from core.sorter import sort_key
+
+def init_states(aggregates):
+    return [[0, 0, None, None] for _ in aggregates]
+
+def accumulate(states, aggregates, row):
+    values = row["values"]
+    for state, agg in zip(states, aggregates):
+        if agg["col_index"] is None:
+            state[0] += 1
+            continue
+
+        # NULLs are ignored by every aggregate except COUNT(*)
+        value = values[agg["col_index"]]
+        if value is None:
+            continue
+
+        func = agg["func"]
+        if func == "COUNT":
+            state[0] += 1
+        elif func in ("SUM", "AVG"):
+            if isinstance(value, (int, float)):
+                state[0] += 1
+                state[1] += value
+        elif func == "MIN":
+            if state[2] is None or sort_key(value) < sort_key(state[2]):
+                state[2] = value
+        elif func == "MAX":
+            if state[3] is None or sort_key(value) > sort_key(state[3]):
+                state[3] = value
+
+def merge_states(states, other_states):
+    """
+    Fold another set of partial states into `states`.
+    """
+    for state, other in zip(states, other_states):
+        state[0] += other[0]
+        state[1] += other[1]
+        if other[2] is not None and (state[2] is None or sort_key(other[2]) < sort_key(state[2])):
+            state[2] = other[2]
+        if other[3] is not None and (state[3] is None or sort_key(other[3]) > sort_key(state[3])):
+            state[3] = other[3]
+
+def finalize(states, aggregates):
+    """
+    Turn partial states into the single result row's values.
+    """
+    values = []
+    for state, agg in zip(states, aggregates):
+        func = agg["func"]
+        if func == "COUNT":
+            values.append(state[0])
+        elif func == "SUM":
+            values.append(state[1] if state[0] else None)
+        elif func == "AVG":
+            values.append(state[1] / state[0] if state[0] else None)
+        elif func == "MIN":
+            values.append(state[2])
+        else:
+            values.append(state[3])
+    return values
+
+def aggregate_rows(rows, aggregates):
+    states = init_states(aggregates)
+    for row in rows:
+        accumulate(states, aggregates, row)
+    return states
@@ -0,0 +1,227 @@
+"""
+Online Backup:
+Copies a live database a few pages at a time, like SQLite's `sqlite3_backup_step`,
+so writers only ever wait for one step. Pages are read through the writer's own
+Pager and tagged with the Pager's write LSNs. Once every page has been visited,
+the last step copies all pages written since their copy was taken, over their
+earlier copy, however many there are. So a backup always finishes, its result
+matches the database as of the last step, and it holds each page at most once.
+
+A backup file holds a header, then records of [page num][CRC32][page bytes].
+An incremental backup names the backup it builds on (its epoch and LSN) and only
+holds pages written since then. `restore` replays a full backup and its
+increments into a new database, checking every page's checksum.
+
+Restore from the command line with:
+python -m core.backup restore new.db full.bak [incremental.bak ...]
+"""
+import os
+import struct
+import sys
+import zlib
+from core.pager import Pager
+
+BACKUP_MAGIC = b"SQLCLONE-BACKUP\x00"
+BACKUP_VERSION = 1
+# version, LSN epoch, base LSN (0 for a full backup), end LSN, page count, page size, record count
+BACKUP_HEADER = struct.Struct('>BQQQIII')
+RECORD_HEADER = struct.Struct('>II')
+DEFAULT_STEP_PAGES = 64
+
+class BackupError(Exception):
+    pass
+
+def read_backup_header(path):
+    """
+    Returns the header of a backup file as a dict.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(BACKUP_MAGIC)) != BACKUP_MAGIC:
+            raise BackupError(f"{path} is not a backup file.")
+        fields = BACKUP_HEADER.unpack(f.read(BACKUP_HEADER.size))
+    header = dict(zip(("version", "epoch", "base_lsn", "end_lsn", "num_pages", "page_size", "records"), fields))
+    if header["version"] != BACKUP_VERSION:
+        raise BackupError(f"{path} has unsupported backup version {header['version']}.")
+    return header
+
+class Backup:
+    def __init__(self, pager, dest_path, base_path=None):
+        """
+        Back up `pager`'s database to `dest_path`. With `base_path` (an earlier
+        backup of the same database), only pages written since it are copied; if
+        the pager can't vouch for changes since then (its LSNs were lost in a
+        crash), every page is.
+        """
+        self.pager = pager
+        pager.track_lsns()
+        self.dest_path = dest_path
+        self.base_lsn = 0
+        if base_path is not None:
+            base = read_backup_header(base_path)
+            if base["epoch"] == pager.lsn_epoch and base["end_lsn"] <= pager.lsn:
+                self.base_lsn = base["end_lsn"]
+
+        # page_num -> LSN of the page when it was copied
+        self.copied: dict[int, int] = {}
+        # page_num -> file offset of its record, reused when the page is copied again
+        self.slots: dict[int, int] = {}
+        self.end = len(BACKUP_MAGIC) + BACKUP_HEADER.size
+        self.next_page = 0
+        self.records = 0
+        self.done = False
+        # Written under a temporary name, so a half-finished backup is never mistaken for one
+        self._tmp_path = dest_path + ".partial"
+        self.file = open(self._tmp_path, "wb")
+        self.file.write(BACKUP_MAGIC + BACKUP_HEADER.pack(BACKUP_VERSION, pager.lsn_epoch, self.base_lsn, 0, 0,
+                                                         pager.page_size, 0))
+
+    def _needs_copy(self, page_num):
+        lsn = self.pager.page_lsn(page_num)
+        if page_num in self.copied:
+            return lsn > self.copied[page_num]
+        return self.base_lsn == 0 or lsn > self.base_lsn
+
+    def step(self, num_pages=DEFAULT_STEP_PAGES):
+        """
+        Copy up to `num_pages` pages. Returns True once the backup is complete.
+        Call it between statements; each call sees the database as it is right then.
+        The step that completes the backup may copy more than `num_pages`.
+        """
+        if self.done:
+            return True
+        copied = 0
+        while copied < num_pages:
+            if self.next_page >= self.pager.num_pages:
+                # Recopying only a budget's worth at a time would never catch up with
+                # writers that touch more pages per step, so the rest goes in one go
+                for page_num in range(self.pager.num_pages):
+                    if self._needs_copy(page_num):
+                        self._copy(page_num)
+                self._finish()
+                return True
+
+            page_num = self.next_page
+            self.next_page += 1
+            if self._needs_copy(page_num):
+                self._copy(page_num)
+                copied += 1
+        return False
+
+    def run(self, step_pages=DEFAULT_STEP_PAGES):
+        """
+        Step until done, for callers that don't need to interleave writes.
+        """
+        while not self.step(step_pages):
+            pass
+
+    @property
+    def remaining(self):
+        """
+        Pages not yet visited in the first pass.
+        """
+        return max(self.pager.num_pages - self.next_page, 0)
+
+    def _copy(self, page_num):
+        page = bytes(self.pager.get_page(page_num))
+        if page_num not in self.slots:
+            self.slots[page_num] = self.end
+            self.end += RECORD_HEADER.size + len(page)
+        self.file.seek(self.slots[page_num])
+        self.file.write(RECORD_HEADER.pack(page_num, zlib.crc32(page)) + page)
+        self.copied[page_num] = self.pager.page_lsn(page_num)
+        self.records = len(self.slots)
+
+    def _finish(self):
+        self.file.seek(len(BACKUP_MAGIC))
+        self.file.write(BACKUP_HEADER.pack(BACKUP_VERSION, self.pager.lsn_epoch, self.base_lsn, self.pager.lsn,
+                                           self.pager.num_pages, self.pager.page_size, self.records))
+        self.file.close()
+        os.replace(self._tmp_path, self.dest_path)
+        self.done = True
+
+    def abort(self):
+        if not self.done:
+            self.file.close()
+            os.remove(self._tmp_path)
+
+def restore(backup_paths, db_file, compression=None):
+    """
+    Rebuild a database at `db_file` (which must not exist yet) from a full backup
+    followed by its incremental backups, in order. Raises BackupError if the
+    chain is broken or any page fails its checksum.
+    """
+    if os.path.exists(db_file):
+        raise BackupError(f"{db_file} already exists.")
+    if not backup_paths:
+        raise BackupError("No backups to restore from.")
+
+    # page_num -> (backup path, offset of its bytes); later backups win
+    locations: dict[int, tuple[str, int]] = {}
+    previous = None
+    for path in backup_paths:
+        header = read_backup_header(path)
+        if previous is not None and header["page_size"] != previous["page_size"]:
+            raise BackupError(f"{path} has {header['page_size']}-byte pages, expected {previous['page_size']}.")
+        if previous is None and header["base_lsn"] != 0:
+            raise BackupError(f"{path} is incremental; restore needs a full backup first.")
+        if previous is not None and (header["base_lsn"] == 0 or header["epoch"] != previous["epoch"]
+                                     or header["base_lsn"] != previous["end_lsn"]):
+            if header["base_lsn"] != 0:
+                raise BackupError(f"{path} doesn't follow on from the backup before it.")
+            # A full backup restarts the chain
+            locations.clear()
+        locations.update(_verify_records(path, header))
+        previous = header
+
+    pager = Pager(db_file, compression=compression, page_size=previous["page_size"])
+    try:
+        files = {}
+        for page_num in range(previous["num_pages"]):
+            page = pager.get_page(page_num)
+            if page_num in locations:
+                path, offset = locations[page_num]
+                if path not in files:
+                    files[path] = open(path, "rb")
+                files[path].seek(offset)
+                page[:] = files[path].read(previous["page_size"])
+            pager.flush_page(page_num)
+        for f in files.values():
+            f.close()
+    finally:
+        pager.close()
+
+def _verify_records(path, header):
+    """
+    Check every record's checksum; returns page_num -> (path, offset) for the newest copy of each page.
+    """
+    locations = {}
+    with open(path, "rb") as f:
+        f.seek(len(BACKUP_MAGIC) + BACKUP_HEADER.size)
+        for _ in range(header["records"]):
+            record = f.read(RECORD_HEADER.size)
+            if len(record) < RECORD_HEADER.size:
+                raise BackupError(f"{path} is truncated.")
+            page_num, crc = RECORD_HEADER.unpack(record)
+            offset = f.tell()
+            page = f.read(header["page_size"])
+            if len(page) < header["page_size"]:
+                raise BackupError(f"{path} is truncated.")
+            if zlib.crc32(page) != crc:
+                raise BackupError(f"Checksum mismatch for page {page_num} in {path}.")
+            locations[page_num] = (path, offset)
+    return locations
+
+def main(argv):
+    if len(argv) < 3 or argv[0] != "restore":
+        print("usage: python -m core.backup restore <new db file> <full backup> [incremental backup ...]")
+        return 2
+    try:
+        restore(argv[2:], argv[1])
+    except BackupError as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Restored {argv[1]} from {len(argv) - 2} backup(s).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,131 @@
+"""
+Bloom Filters:
+An optional per-table Bloom filter over primary keys, so point lookups for keys
+that don't exist return without descending the table's B-Tree. The bit array
+lives in pages of its own, allocated from the pager and written through like
+tree pages, and the table's catalog row records the pages and the filter's shape.
+A Bloom filter can't forget, so deleted keys keep costing false positives until
+ANALYZE rebuilds it; once more keys than planned for are added, it rebuilds itself
+at twice the size.
+"""
+import hashlib
+import math
+
+DEFAULT_BLOOM_FP_RATE = 0.01
+# Smallest number of keys a filter is sized for, so a fresh table doesn't rebuild on every few inserts
+MIN_BLOOM_KEYS = 1024
+
+class BloomFilter:
+    def __init__(self, pager, meta):
+        """
+        `meta` is the filter's entry in the catalog row:
+        {"fp_rate", "capacity", "bits", "hashes", "keys", "pages": [[first page, count], ...]}
+        """
+        self.pager = pager
+        self.meta = meta
+        self.bits = meta["bits"]
+        self.hashes = meta["hashes"]
+        self.bits_per_page = pager.page_size * 8
+        self.page_nums = [first + i for first, count in meta["pages"] for i in range(count)]
+        # Key count as last written to the catalog
+        self.saved_keys = meta["keys"]
+        # Since the filter was opened: keys it ruled out, and keys it let through that
+        # turned out not to exist (counted by the caller)
+        self.negatives = 0
+        self.false_positives = 0
+
+    @classmethod
+    def create(cls, pager, keys, fp_rate=DEFAULT_BLOOM_FP_RATE, capacity=0):
+        """
+        Build a filter over `keys`, sized for at least `capacity` keys at `fp_rate`.
+        """
+        keys = list(keys)
+        capacity = max(capacity, 2 * len(keys), MIN_BLOOM_KEYS)
+        # Optimal size and number of hash functions for `capacity` keys
+        bits = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+        hashes = max(1, round(bits / capacity * math.log(2)))
+
+        runs: list[list[int]] = []
+        for _ in range(-(-bits // (pager.page_size * 8))):
+            page_num = pager.allocate_page()
+            if runs and runs[-1][0] + runs[-1][1] == page_num:
+                runs[-1][1] += 1
+            else:
+                runs.append([page_num, 1])
+
+        bloom = cls(pager, {"fp_rate": fp_rate, "capacity": capacity, "bits": bits, "hashes": hashes,
+                            "keys": 0, "pages": runs})
+        for key in keys:
+            bloom._set(key)
+        for page_num in bloom.page_nums:
+            pager.flush_page(page_num)
+        bloom.meta["keys"] = len(keys)
+        return bloom
+
+    def _positions(self, key):
+        # Double hashing: two 64-bit halves of one digest give all the bit positions
+        digest = hashlib.blake2b(key.to_bytes(4, 'big'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def _set(self, key):
+        """
+        Set a key's bits and return the pages that changed.
+        """
+        changed = set()
+        for position in self._positions(key):
+            page_num = self.page_nums[position // self.bits_per_page]
+            page = self.pager.get_page(page_num)
+            byte_index, mask = (position % self.bits_per_page) // 8, 1 << (position % 8)
+            if not page[byte_index] & mask:
+                page[byte_index] |= mask
+                changed.add(page_num)
+        return changed
+
+    def add(self, key):
+        for page_num in self._set(key):
+            self.pager.flush_page(page_num)
+        self.meta["keys"] += 1
+
+    def might_contain(self, key):
+        """
+        False means the key is definitely not in the table.
+        """
+        for position in self._positions(key):
+            page = self.pager.get_page(self.page_nums[position // self.bits_per_page])
+            if not page[(position % self.bits_per_page) // 8] & (1 << (position % 8)):
+                self.negatives += 1
+                return False
+        return True
+
+    def is_full(self):
+        return self.meta["keys"] > self.meta["capacity"]
+
+    def estimated_fp_rate(self):
+        """
+        Expected false-positive rate for the keys added so far.
+        """
+        return (1 - math.exp(-self.hashes * self.meta["keys"] / self.bits)) ** self.hashes
+
+    def report(self):
+        """
+        The filter's shape and false-positive rates, as shown in ANALYZE statistics.
+        """
+        misses = self.negatives + self.false_positives
+        return {
+            "fp_rate": self.meta["fp_rate"],
+            "estimated_fp_rate": self.estimated_fp_rate(),
+            "observed_fp_rate": self.false_positives / misses if misses else 0.0,
+            "keys": self.meta["keys"],
+            "capacity": self.meta["capacity"],
+            "bits": self.bits,
+            "hashes": self.hashes,
+        }
+
+    def free(self):
+        """
+        Give the filter's pages back to the pager.
+        """
+        for page_num in self.page_nums:
+            self.pager.free_page(page_num)
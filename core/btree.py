@@ -4,8 +4,7 @@ B-Tree structure where each node lives in one page.
 Implements insert, search, and a simple in-order traversal.
 """
 import struct
-from core.pager import PAGE_SIZE
-from core.serializer import serialize_row, deserialize_row
+from core.serializer import serialize_row, deserialize_row, deserialize_payload, deserialize_payloads
 
 NODE_TYPE_LEAF = 1
 NODE_TYPE_INTERNAL = 2
@@ -21,13 +20,30 @@ INTERNAL_NODE_HEADER_SIZE = 12
 RIGHT_CHILD_OFFSET = 8
 
 class BTree:
-    def __init__(self, pager):
+    def __init__(self, pager, root_page_num=0):
         self.pager = pager
-        self.root_page_num = 0
+        self.root_page_num = root_page_num
+        # Node sizes follow the database's page size
+        self.page_size = pager.page_size
+        # Each internal cell is [4 bytes: child page] [4 bytes: key]
+        self.internal_max_cells = (self.page_size - INTERNAL_NODE_HEADER_SIZE) // 8
+        # A non-root leaf holding fewer bytes of cells than this borrows from or merges with a sibling
+        self.leaf_min_fill = (self.page_size - LEAF_NODE_HEADER_SIZE) // 3
         
-        if pager.num_pages == 0:
+        # A root page past the end of the file is a brand new (empty) tree
+        if root_page_num >= pager.num_pages:
             self._initialize_root()
             
+    @classmethod
+    def create(cls, pager):
+        """
+        Start a new, empty tree on a freshly allocated page.
+        """
+        tree = cls(pager, pager.allocate_page())
+        tree._initialize_root()
+        pager.flush_page(tree.root_page_num)
+        return tree
+
     def _initialize_root(self):
         page = self.pager.get_page(self.root_page_num)
         self._set_node_type(page, NODE_TYPE_LEAF)
@@ -75,12 +91,44 @@ class BTree:
             offset += 2 + payload_len
         return offset
 
+    def _leaf_node_cell_offsets(self, page):
+        """
+        Offsets of every cell in a leaf, found in a single pass over the page.
+        """
+        offsets = []
+        offset = LEAF_NODE_HEADER_SIZE
+        for _ in range(self._get_num_cells(page)):
+            offsets.append(offset)
+            payload_len = struct.unpack('>H', page[offset+4:offset+6])[0]
+            offset += 4 + 2 + payload_len
+        return offsets
+
     def _internal_node_cell_offset(self, cell_num):
         return INTERNAL_NODE_HEADER_SIZE + (cell_num * 8)
 
+    # --- Row Size ---
+    def _encode_row(self, row_dict):
+        """
+        Serialize a row, raising ValueError if it wouldn't fit in a leaf on its own.
+        """
+        try:
+            payload = serialize_row(row_dict)
+        except struct.error:
+            # Longer than the 2-byte length prefix can describe
+            payload = None
+        if payload is None or LEAF_NODE_HEADER_SIZE + 4 + len(payload) > self.page_size:
+            raise ValueError(f"Row is too big for a {self.page_size}-byte page.")
+        return payload
+
+    def check_row(self, row_dict):
+        """
+        Raise ValueError if `row_dict` is too big to store, without touching the tree.
+        """
+        self._encode_row(row_dict)
+
     # --- Insert Logic ---
     def insert(self, key, row_dict):
-        payload = serialize_row(row_dict)
+        payload = self._encode_row(row_dict)
         page_num = self._find_leaf_node(key)
         page = self.pager.get_page(page_num)
         
@@ -99,7 +147,7 @@ class BTree:
         cell_size = 4 + len(payload)
         end_offset = self._leaf_node_cell_offset(num_cells, page)
         
-        if end_offset + cell_size > PAGE_SIZE:
+        if end_offset + cell_size > self.page_size:
             # Splitting required
             self._split_leaf_node(page_num, insert_index, key, payload)
         else:
@@ -121,47 +169,29 @@ class BTree:
         page[start_offset+4:start_offset+4+len(payload)] = payload  # type: ignore
         
         self._set_num_cells(page, num_cells + 1)
-        # Clear out space beyond to maintain exact 4096 bytes size
-        page[end_offset + cell_size:] = bytearray(PAGE_SIZE - (end_offset + cell_size))  # type: ignore
+        # Clear out space beyond to keep the page exactly one page long
+        page[end_offset + cell_size:] = bytearray(self.page_size - (end_offset + cell_size))  # type: ignore
         self.pager.flush_page(page_num)
 
     def _split_leaf_node(self, old_page_num, insert_index, key, payload):
         old_page = self.pager.get_page(old_page_num)
-        num_cells = self._get_num_cells(old_page)
-        
-        cells = []
-        for i in range(num_cells):
-            offset = self._leaf_node_cell_offset(i, old_page)
-            cell_key = struct.unpack('>I', old_page[offset:offset+4])[0]
-            payload_len = struct.unpack('>H', old_page[offset+4:offset+6])[0]
-            cell_payload = old_page[offset+4:offset+4+2+payload_len]
-            cells.append((cell_key, cell_payload))
-            
+        cells = self._read_leaf_cells(old_page)
         cells.insert(insert_index, (key, payload))
         
-        # Split point
-        mid = len(cells) // 2
+        # Split point: half of the bytes on each side
+        mid = self._leaf_split_point(cells)
         left_cells = cells[:mid]  # type: ignore
         right_cells = cells[mid:]
         
         # Allocate new right page
-        right_page_num = self.pager.num_pages
-        right_page = self.pager.get_page(right_page_num) # This creates it
+        right_page_num = self.pager.allocate_page()
+        right_page = self.pager.get_page(right_page_num)
         self._set_node_type(right_page, NODE_TYPE_LEAF)
         self._set_is_root(right_page, 0)
         self._set_parent_pointer(right_page, 0)
-        self._set_num_cells(right_page, 0)
         
-        # Reset old page (left)
-        self._set_num_cells(old_page, 0)
-        # Re-initialize the byte array beyond header to avoid old data
-        old_page[LEAF_NODE_HEADER_SIZE:] = bytearray(PAGE_SIZE - LEAF_NODE_HEADER_SIZE)  # type: ignore
-        for i, (k, p) in enumerate(left_cells):
-            self._insert_into_leaf(old_page_num, i, k, p)
-            
-        # Fill new page (right)
-        for i, (k, p) in enumerate(right_cells):
-            self._insert_into_leaf(right_page_num, i, k, p)
+        self._write_leaf_cells(old_page_num, left_cells)
+        self._write_leaf_cells(right_page_num, right_cells)
             
         right_min_key = right_cells[0][0]
         
@@ -171,62 +201,314 @@ class BTree:
         else:
             parent_page_num = self._get_parent_pointer(old_page)
             self._set_parent_pointer(right_page, parent_page_num)
+            self.pager.flush_page(right_page_num)
             self._insert_into_internal(parent_page_num, old_page_num, right_page_num, right_min_key)
 
     def _create_new_root(self, left_page_num, right_page_num, split_key):
-        # We move the left child (which was the root at page 0) to a new page
-        # And rewrite page 0 as the internal root node traversing them.
-        left_child_page_num = self.pager.num_pages
+        # We move the left child (which was the root) to a new page
+        # And rewrite the root page as the internal root node traversing them,
+        # so the root page number never changes.
+        left_child_page_num = self.pager.allocate_page()
         left_child_page = self.pager.get_page(left_child_page_num)
-        old_root_page = self.pager.get_page(self.root_page_num) # page 0
+        old_root_page = self.pager.get_page(self.root_page_num)
         
         # Copy content
         left_child_page[:] = old_root_page[:]  # type: ignore
         self._set_is_root(left_child_page, 0)
         self._set_parent_pointer(left_child_page, self.root_page_num)
+        if self._get_node_type(left_child_page) == NODE_TYPE_INTERNAL:
+            # The old root's children now hang off its copy
+            children, _ = self._read_internal(left_child_page)
+            self._adopt_children(left_child_page_num, children)
         
         right_child_page = self.pager.get_page(right_page_num)
         self._set_parent_pointer(right_child_page, self.root_page_num)
         
         # Turn old root into internal node
-        self._set_node_type(old_root_page, NODE_TYPE_INTERNAL)
-        self._set_is_root(old_root_page, 1)
-        self._set_num_cells(old_root_page, 0)
-        self._set_right_child(old_root_page, right_page_num)
-        
-        # Wipe rest of root page
-        old_root_page[INTERNAL_NODE_HEADER_SIZE:] = bytearray(PAGE_SIZE - INTERNAL_NODE_HEADER_SIZE)  # type: ignore
-        self._insert_into_internal(self.root_page_num, left_child_page_num, right_page_num, split_key)
+        self._write_internal(self.root_page_num, [left_child_page_num, right_page_num], [split_key])
 
         self.pager.flush_page(left_child_page_num)
         self.pager.flush_page(right_page_num)
 
     def _insert_into_internal(self, internal_page_num, left_child_page_num, right_child_page_num, key):
+        """
+        `left_child_page_num` just split; hang `right_child_page_num` next to it
+        with `key` as the separator between the two.
+        """
         page = self.pager.get_page(internal_page_num)
+        children, keys = self._read_internal(page)
+
+        # The new right page takes over the pointer slot just after its left sibling
+        index = children.index(left_child_page_num)
+        children.insert(index + 1, right_child_page_num)
+        keys.insert(index, key)
+
+        if len(keys) <= self.internal_max_cells:
+            self._write_internal(internal_page_num, children, keys)
+            return
+
+        # Too many cells: split the internal node and push the middle key up
+        mid = len(keys) // 2
+        up_key = keys[mid]
+        right_page_num = self.pager.allocate_page()
+        self._write_internal(internal_page_num, children[:mid + 1], keys[:mid])
+        self._write_internal(right_page_num, children[mid + 1:], keys[mid + 1:])
+        self._adopt_children(right_page_num, children[mid + 1:])
+
+        if self._get_is_root(page):
+            self._create_new_root(internal_page_num, right_page_num, up_key)
+        else:
+            parent_page_num = self._get_parent_pointer(page)
+            right_page = self.pager.get_page(right_page_num)
+            self._set_parent_pointer(right_page, parent_page_num)
+            self.pager.flush_page(right_page_num)
+            self._insert_into_internal(parent_page_num, internal_page_num, right_page_num, up_key)
+
+    # --- Whole-Node Helpers ---
+    def _read_leaf_cells(self, page):
+        """
+        All cells of a leaf as (key, length-prefixed payload) pairs.
+        """
+        cells = []
+        for offset in self._leaf_node_cell_offsets(page):
+            cell_key = struct.unpack('>I', page[offset:offset+4])[0]
+            payload_len = struct.unpack('>H', page[offset+4:offset+6])[0]
+            cells.append((cell_key, bytes(page[offset+4:offset+4+2+payload_len])))
+        return cells
+
+    def _write_leaf_cells(self, page_num, cells):
+        """
+        Rewrite a leaf's cells in one go, keeping its header fields.
+        """
+        page = self.pager.get_page(page_num)
+        offset = LEAF_NODE_HEADER_SIZE
+        for cell_key, payload in cells:
+            page[offset:offset+4] = struct.pack('>I', cell_key)
+            page[offset+4:offset+4+len(payload)] = payload  # type: ignore
+            offset += 4 + len(payload)
+        page[offset:] = bytearray(self.page_size - offset)  # type: ignore
+        self._set_num_cells(page, len(cells))
+        self.pager.flush_page(page_num)
+
+    def _leaf_split_point(self, cells):
+        """
+        Index that splits cells into two runs of roughly equal bytes.
+        """
+        total = sum(4 + len(payload) for _, payload in cells)
+        running = 0
+        for i, (_, payload) in enumerate(cells):
+            running += 4 + len(payload)
+            if running * 2 >= total:
+                # Keep at least one cell on each side
+                return min(max(i + 1, 1), len(cells) - 1)
+        return len(cells) // 2
+
+    def _leaf_used_bytes(self, page):
+        return self._leaf_node_cell_offset(self._get_num_cells(page), page) - LEAF_NODE_HEADER_SIZE
+
+    def _read_internal(self, page):
+        """
+        An internal node as (children, keys): child i holds keys below key i,
+        and the last child (the right child) holds everything else.
+        """
+        children, keys = [], []
+        for i in range(self._get_num_cells(page)):
+            cell_offset = self._internal_node_cell_offset(i)
+            child_page_num, cell_key = struct.unpack('>II', page[cell_offset:cell_offset+8])
+            children.append(child_page_num)
+            keys.append(cell_key)
+        children.append(self._get_right_child(page))
+        return children, keys
+
+    def _write_internal(self, page_num, children, keys):
+        page = self.pager.get_page(page_num)
+        self._set_node_type(page, NODE_TYPE_INTERNAL)
+        self._set_num_cells(page, len(keys))
+        for i, cell_key in enumerate(keys):
+            cell_offset = self._internal_node_cell_offset(i)
+            page[cell_offset:cell_offset+8] = struct.pack('>II', children[i], cell_key)
+        self._set_right_child(page, children[-1])
+        end_offset = self._internal_node_cell_offset(len(keys))
+        page[end_offset:] = bytearray(self.page_size - end_offset)  # type: ignore
+        self.pager.flush_page(page_num)
+
+    def _adopt_children(self, parent_page_num, children):
+        for child_page_num in children:
+            child_page = self.pager.get_page(child_page_num)
+            self._set_parent_pointer(child_page, parent_page_num)
+            self.pager.flush_page(child_page_num)
+
+    # --- Update Logic ---
+    def update(self, key, row_dict):
+        """
+        Replace the row stored under `key`. Returns False if the key doesn't exist.
+        The new payload is written in place when the leaf still has room for it.
+        Raises ValueError, leaving the old row alone, if the new one can't fit in a page.
+        """
+        payload = self._encode_row(row_dict)
+        page_num = self._find_leaf_node(key)
+        page = self.pager.get_page(page_num)
+
+        cell_offsets = self._leaf_node_cell_offsets(page)
+        for i, cell_offset in enumerate(cell_offsets):
+            cell_key = struct.unpack('>I', page[cell_offset:cell_offset+4])[0]
+            if cell_key != key:
+                continue
+
+            old_payload_len = 2 + struct.unpack('>H', page[cell_offset+4:cell_offset+6])[0]
+            end_offset = self._leaf_node_cell_offset(len(cell_offsets), page)
+            if end_offset - old_payload_len + len(payload) <= self.page_size:
+                # Swap the payload and slide the cells after it left or right
+                tail = page[cell_offset+4+old_payload_len:end_offset]
+                new_end = cell_offset + 4 + len(payload) + len(tail)
+                page[cell_offset+4:new_end] = payload + tail  # type: ignore
+                page[new_end:] = bytearray(self.page_size - new_end)  # type: ignore
+                self.pager.flush_page(page_num)
+                self._rebalance_leaf(page_num)
+            else:
+                # Too big for this leaf: take the old cell out and let insert split the leaf
+                self._remove_from_leaf(page_num, i)
+                self.insert(key, row_dict)
+            return True
+        return False
+
+    def _remove_from_leaf(self, page_num, cell_num):
+        page = self.pager.get_page(page_num)
         num_cells = self._get_num_cells(page)
-        
-        insert_index = num_cells
-        for i in range(num_cells):
-            offset = self._internal_node_cell_offset(i)
-            cell_key = struct.unpack('>I', page[offset+4:offset+8])[0]
-            if key < cell_key:
-                insert_index = i
-                break
-                
-        start_offset = self._internal_node_cell_offset(insert_index)
-        end_offset = self._internal_node_cell_offset(num_cells)
-        
-        if insert_index < num_cells:
-            page[start_offset + 8 : end_offset + 8] = page[start_offset : end_offset]  # type: ignore
-            
-        page[start_offset:start_offset+4] = struct.pack('>I', left_child_page_num)
-        page[start_offset+4:start_offset+8] = struct.pack('>I', key)
-        
-        if insert_index == num_cells:
-            self._set_right_child(page, right_child_page_num)
-            
-        self._set_num_cells(page, num_cells + 1)
-        self.pager.flush_page(internal_page_num)
+
+        start_offset = self._leaf_node_cell_offset(cell_num, page)
+        next_offset = self._leaf_node_cell_offset(cell_num + 1, page)
+        end_offset = self._leaf_node_cell_offset(num_cells, page)
+
+        # Shift cells left over the removed one
+        new_end = start_offset + (end_offset - next_offset)
+        page[start_offset:new_end] = page[next_offset:end_offset]  # type: ignore
+        page[new_end:] = bytearray(self.page_size - new_end)  # type: ignore
+
+        self._set_num_cells(page, num_cells - 1)
+        self.pager.flush_page(page_num)
+
+    # --- Delete Logic ---
+    def delete(self, key):
+        """
+        Remove the row stored under `key`. Returns False if the key doesn't exist.
+        """
+        page_num = self._find_leaf_node(key)
+        page = self.pager.get_page(page_num)
+
+        for i, cell_offset in enumerate(self._leaf_node_cell_offsets(page)):
+            cell_key = struct.unpack('>I', page[cell_offset:cell_offset+4])[0]
+            if cell_key == key:
+                self._remove_from_leaf(page_num, i)
+                self._rebalance_leaf(page_num)
+                return True
+        return False
+
+    def _rebalance_leaf(self, page_num):
+        """
+        Keep leaves dense: an underfull leaf merges with a sibling if both fit in
+        one page, and otherwise borrows cells so the two share them evenly.
+        """
+        page = self.pager.get_page(page_num)
+        if self._get_is_root(page) or self._leaf_used_bytes(page) >= self.leaf_min_fill:
+            return
+
+        parent_page_num = self._get_parent_pointer(page)
+        parent_page = self.pager.get_page(parent_page_num)
+        children, keys = self._read_internal(parent_page)
+        if len(children) < 2:
+            return
+
+        # Pair up with the left sibling, or the right one for the leftmost child
+        index = children.index(page_num)
+        sep_index = index - 1 if index > 0 else 0
+        left_page_num, right_page_num = children[sep_index], children[sep_index + 1]
+
+        cells = (self._read_leaf_cells(self.pager.get_page(left_page_num))
+                 + self._read_leaf_cells(self.pager.get_page(right_page_num)))
+        total_bytes = sum(4 + len(payload) for _, payload in cells)
+
+        if LEAF_NODE_HEADER_SIZE + total_bytes <= self.page_size:
+            # Merge: everything moves into the left page and the right page is freed
+            self._write_leaf_cells(left_page_num, cells)
+            del children[sep_index + 1]
+            del keys[sep_index]
+            self._write_internal(parent_page_num, children, keys)
+            self.pager.free_page(right_page_num)
+            self._rebalance_internal(parent_page_num)
+        else:
+            # Redistribute: split the combined cells evenly and fix the separator
+            mid = self._leaf_split_point(cells)
+            self._write_leaf_cells(left_page_num, cells[:mid])
+            self._write_leaf_cells(right_page_num, cells[mid:])
+            keys[sep_index] = cells[mid][0]
+            self._write_internal(parent_page_num, children, keys)
+
+    def _rebalance_internal(self, page_num):
+        """
+        The counterpart of `_insert_into_internal`: after a child merge removed a
+        separator, merge or redistribute an internal node that fell below half full.
+        A root left with a single child is collapsed into it, shrinking the tree.
+        """
+        page = self.pager.get_page(page_num)
+        children, keys = self._read_internal(page)
+
+        if self._get_is_root(page):
+            if not keys:
+                self._collapse_root(children[0])
+            return
+        if len(keys) >= self.internal_max_cells // 2:
+            return
+
+        parent_page_num = self._get_parent_pointer(page)
+        parent_children, parent_keys = self._read_internal(self.pager.get_page(parent_page_num))
+        if len(parent_children) < 2:
+            return
+
+        index = parent_children.index(page_num)
+        sep_index = index - 1 if index > 0 else 0
+        left_page_num, right_page_num = parent_children[sep_index], parent_children[sep_index + 1]
+        left_children, left_keys = self._read_internal(self.pager.get_page(left_page_num))
+        right_children, right_keys = self._read_internal(self.pager.get_page(right_page_num))
+
+        # The parent's separator comes down between the two siblings' keys
+        merged_children = left_children + right_children
+        merged_keys = left_keys + [parent_keys[sep_index]] + right_keys
+
+        if len(merged_keys) <= self.internal_max_cells:
+            self._write_internal(left_page_num, merged_children, merged_keys)
+            self._adopt_children(left_page_num, right_children)
+            del parent_children[sep_index + 1]
+            del parent_keys[sep_index]
+            self._write_internal(parent_page_num, parent_children, parent_keys)
+            self.pager.free_page(right_page_num)
+            self._rebalance_internal(parent_page_num)
+        else:
+            # The middle key moves up to become the new separator
+            mid = len(merged_keys) // 2
+            self._write_internal(left_page_num, merged_children[:mid + 1], merged_keys[:mid])
+            self._write_internal(right_page_num, merged_children[mid + 1:], merged_keys[mid + 1:])
+            self._adopt_children(left_page_num, merged_children[:mid + 1])
+            self._adopt_children(right_page_num, merged_children[mid + 1:])
+            parent_keys[sep_index] = merged_keys[mid]
+            self._write_internal(parent_page_num, parent_children, parent_keys)
+
+    def _collapse_root(self, only_child_page_num):
+        """
+        Copy the root's only child into the root page (the root page number never
+        changes) and free the child's page.
+        """
+        root_page = self.pager.get_page(self.root_page_num)
+        child_page = self.pager.get_page(only_child_page_num)
+        root_page[:] = child_page[:]  # type: ignore
+        self._set_is_root(root_page, 1)
+        self._set_parent_pointer(root_page, 0)
+        self.pager.flush_page(self.root_page_num)
+
+        if self._get_node_type(root_page) == NODE_TYPE_INTERNAL:
+            children, _ = self._read_internal(root_page)
+            self._adopt_children(self.root_page_num, children)
+        self.pager.free_page(only_child_page_num)
 
     # --- Search Logic ---
     def search(self, key):
@@ -245,7 +527,9 @@ class BTree:
                 
         return None
 
-    def _find_leaf_node(self, key, page_num=0):
+    def _find_leaf_node(self, key, page_num=None):
+        if page_num is None:
+            page_num = self.root_page_num
         page = self.pager.get_page(page_num)
         node_type = self._get_node_type(page)
         
@@ -264,26 +548,124 @@ class BTree:
         right_child = self._get_right_child(page)
         return self._find_leaf_node(key, right_child)
         
-    def traverse(self, page_num=0):
+    def traverse(self, page_num=None, reverse=False, low=None, high=None):
+        """
+        Yield all rows in primary key order (descending if `reverse` is set).
+        `low` and `high` are optional inclusive key bounds; subtrees entirely
+        outside them are never read.
+        """
+        for _, payload in self.traverse_cells(page_num, reverse, low, high):
+            yield deserialize_payload(payload)
+
+    def traverse_batches(self, batch_size, page_num=None, reverse=False, low=None, high=None):
+        """
+        Like `traverse`, but yield lists of up to `batch_size` rows. Each batch is
+        decoded with a single JSON parse, which is what column batch scans build on.
+        """
+        payloads = []
+        for _, payload in self.traverse_cells(page_num, reverse, low, high):
+            payloads.append(payload)
+            if len(payloads) == batch_size:
+                yield deserialize_payloads(payloads)
+                payloads = []
+        if payloads:
+            yield deserialize_payloads(payloads)
+
+    def keys(self):
         """
-        Yield all rows in primary key order.
+        Yield every primary key in order without decoding any row.
         """
+        for key, _ in self.traverse_cells():
+            yield key
+
+    def traverse_cells(self, page_num=None, reverse=False, low=None, high=None):
+        """
+        Yield (key, raw JSON payload) for every row in key order, without decoding it.
+        """
+        if page_num is None:
+            page_num = self.root_page_num
         page = self.pager.get_page(page_num)
         node_type = self._get_node_type(page)
         
         if node_type == NODE_TYPE_LEAF:
-            num_cells = self._get_num_cells(page)
-            for i in range(num_cells):
-                cell_offset = self._leaf_node_cell_offset(i, page)
-                payload_bytes = page[cell_offset+4:]
-                row_dict, _ = deserialize_row(payload_bytes)
-                yield row_dict
+            cell_offsets = self._leaf_node_cell_offsets(page)
+            if reverse:
+                cell_offsets.reverse()
+            for cell_offset in cell_offsets:
+                # Check the key before paying for the JSON decode
+                cell_key, payload_len = struct.unpack('>IH', page[cell_offset:cell_offset+6])
+                if (low is not None and cell_key < low) or (high is not None and cell_key > high):
+                    continue
+                yield cell_key, page[cell_offset+6:cell_offset+6+payload_len]
         else:
+            # Child i holds keys in [key i-1, key i), the right child holds keys >= the last key
             num_cells = self._get_num_cells(page)
+            children = []
+            lower_key = None
             for i in range(num_cells):
                 cell_offset = self._internal_node_cell_offset(i)
-                child_page_num = struct.unpack('>I', page[cell_offset:cell_offset+4])[0]
-                yield from self.traverse(child_page_num)
-                
-            right_child = self._get_right_child(page)
-            yield from self.traverse(right_child)
+                child_page_num, cell_key = struct.unpack('>II', page[cell_offset:cell_offset+8])
+                if (low is None or cell_key > low) and (high is None or lower_key is None or lower_key <= high):
+                    children.append(child_page_num)
+                lower_key = cell_key
+            if high is None or lower_key is None or lower_key <= high:
+                children.append(self._get_right_child(page))
+            
+            if reverse:
+                children.reverse()
+            for child_page_num in children:
+                yield from self.traverse_cells(child_page_num, reverse, low, high)
+
+    # --- Tree Shape ---
+    def walk_pages(self, page_num=None):
+        """
+        Yield (page_num, is_leaf, num_cells) for every node, in key order,
+        reading only page headers and never decoding rows.
+        """
+        if page_num is None:
+            page_num = self.root_page_num
+        page = self.pager.get_page(page_num)
+        num_cells = self._get_num_cells(page)
+
+        if self._get_node_type(page) == NODE_TYPE_LEAF:
+            yield page_num, True, num_cells
+            return
+
+        yield page_num, False, num_cells
+        for i in range(num_cells):
+            cell_offset = self._internal_node_cell_offset(i)
+            child_page_num = struct.unpack('>I', page[cell_offset:cell_offset+4])[0]
+            yield from self.walk_pages(child_page_num)
+        yield from self.walk_pages(self._get_right_child(page))
+
+    def subtrees(self, level):
+        """
+        (page_num, low_key, high_key) for every node `level` steps below the root,
+        in key order. Keys in a subtree satisfy low_key <= key < high_key, with
+        None meaning unbounded. Leaves reached early are kept as they are.
+        """
+        nodes = [(self.root_page_num, None, None)]
+        for _ in range(level):
+            next_nodes = []
+            for page_num, low_key, high_key in nodes:
+                page = self.pager.get_page(page_num)
+                if self._get_node_type(page) == NODE_TYPE_LEAF:
+                    next_nodes.append((page_num, low_key, high_key))
+                    continue
+                children, keys = self._read_internal(page)
+                bounds = [low_key] + keys + [high_key]
+                for i, child_page_num in enumerate(children):
+                    next_nodes.append((child_page_num, bounds[i], bounds[i + 1]))
+            nodes = next_nodes
+        return nodes
+
+    def depth(self):
+        """
+        Number of levels from the root down to the leaves (1 for a lone root leaf).
+        """
+        levels = 1
+        page = self.pager.get_page(self.root_page_num)
+        while self._get_node_type(page) == NODE_TYPE_INTERNAL:
+            levels += 1
+            page = self.pager.get_page(self._get_right_child(page))
+        return levels
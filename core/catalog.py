@@ -0,0 +1,159 @@
+"""
+The Catalog (Schema Table):
+Like SQLite's `sqlite_master`, the catalog B-Tree holds one row per table:
+its name, its column names and the root page of the table's own B-Tree, plus
+ANALYZE statistics and the table's Bloom filter, if it has them.
+The database header keeps each table's row count and tree depth next to its
+root page, so those are known without reading the table.
+"""
+from core.bloom import BloomFilter
+from core.btree import BTree
+from core.header import DatabaseHeader
+from core.stats import compact_stats
+
+# Where the catalog lives in databases created before the header existed
+LEGACY_CATALOG_ROOT_PAGE = 0
+
+class Catalog:
+    def __init__(self, pager):
+        self.pager = pager
+        if pager.num_pages == 0 and not pager.read_only:
+            pager.create_header()
+        self.header = pager.header
+        catalog_root = self.header.catalog_root if self.header is not None else LEGACY_CATALOG_ROOT_PAGE
+        self.btree = BTree(pager, catalog_root)
+
+        # The schema is tiny, so keep all of it in memory: table name -> catalog row
+        self.tables: dict[str, dict] = {}
+        for row in self.btree.traverse():
+            if "name" not in row:
+                # The first version kept user rows straight in page 0's tree, with no table names or columns
+                raise ValueError(f"{pager.filename} predates the catalog and can't be opened; "
+                                 f"recreate it with this version.")
+            self.tables[row["name"]] = row
+        # table name -> Bloom filter over its primary keys, for tables that have one
+        self.blooms: dict[str, BloomFilter] = {
+            name: BloomFilter(pager, row["bloom"]) for name, row in self.tables.items() if row.get("bloom")
+        }
+
+    def create_table(self, table_name, columns):
+        if table_name in self.tables:
+            raise Exception(f"Table {table_name} already exists.")
+        if self.header is not None and len(self.header.tables) >= DatabaseHeader.max_tables(self.pager.page_size):
+            raise Exception(f"The database header has no room for another table at {self.pager.page_size}-byte pages.")
+
+        # Every table gets its own tree, rooted on a freshly allocated page
+        root_page_num = BTree.create(self.pager).root_page_num
+
+        table_id = max((row["id"] for row in self.tables.values()), default=0) + 1
+        row = {"id": table_id, "name": table_name, "columns": columns, "root_page": root_page_num}
+        self.btree.insert(table_id, row)
+        self.tables[table_name] = row
+        if self.header is not None:
+            self.header.tables[table_id] = [root_page_num, 0, 1]
+            self.pager.commit_header()
+        return row
+
+    def set_stats(self, table_name, stats):
+        """
+        Store the statistics gathered by ANALYZE in the table's catalog row.
+        Its exact row count and depth also replace the ones in the header.
+        The row has to fit in one page, so wide tables keep coarser statistics;
+        raises ValueError if even the smallest version doesn't fit.
+        """
+        row = self.tables[table_name]
+        for candidate in compact_stats(stats):
+            try:
+                self.btree.check_row(dict(row, stats=candidate))
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Statistics for {table_name} don't fit in its catalog row.")
+        row["stats"] = candidate
+        self.btree.update(row["id"], row)
+        if self.header is not None:
+            entry = self.header.tables[row["id"]]
+            entry[1], entry[2] = stats["row_count"], stats["depth"]
+            self.pager.commit_header()
+
+    def count_rows(self, table_name, delta):
+        """
+        Record that a statement added (or with a negative `delta`, removed) rows,
+        along with the table's depth after it, in one header commit. Nothing is
+        written when neither changed.
+        """
+        if self.header is None:
+            return
+        entry = self.header.tables[self.tables[table_name]["id"]]
+        depth = self.open_tree(table_name).depth()
+        if delta == 0 and depth == entry[2]:
+            return
+        entry[1] += delta
+        entry[2] = depth
+        self.pager.commit_header()
+
+    def row_count(self, table_name):
+        """
+        The table's row count from the header, or None for databases without one.
+        """
+        if self.header is None:
+            return None
+        return self.header.tables[self.tables[table_name]["id"]][1]
+
+    def table_depth(self, table_name):
+        """
+        Levels in the table's B-Tree from the header, or None for databases without one.
+        """
+        if self.header is None:
+            return None
+        return self.header.tables[self.tables[table_name]["id"]][2]
+
+    def create_bloom(self, table_name, fp_rate, capacity=0):
+        """
+        (Re)build a table's Bloom filter from its current keys, replacing any old one.
+        """
+        old = self.blooms.pop(table_name, None)
+        if old is not None:
+            old.free()
+        bloom = BloomFilter.create(self.pager, self.open_tree(table_name).keys(), fp_rate, capacity)
+        self.blooms[table_name] = bloom
+        row = self.tables[table_name]
+        row["bloom"] = bloom.meta
+        self.btree.update(row["id"], row)
+        bloom.saved_keys = bloom.meta["keys"]
+        return bloom
+
+    def bloom_add(self, table_name, key):
+        """
+        Record a newly inserted key in the table's Bloom filter, if it has one.
+        """
+        bloom = self.blooms.get(table_name)
+        if bloom is None:
+            return
+        bloom.add(key)
+        if bloom.is_full():
+            self.create_bloom(table_name, bloom.meta["fp_rate"], 2 * bloom.meta["capacity"])
+
+    def save_bloom_counts(self):
+        """
+        Persist the key counts of Bloom filters that took inserts. Only sizing and
+        the reported false-positive rate depend on them, so they are saved lazily.
+        """
+        for table_name, bloom in self.blooms.items():
+            if bloom.meta["keys"] != bloom.saved_keys:
+                row = self.tables[table_name]
+                self.btree.update(row["id"], row)
+                bloom.saved_keys = bloom.meta["keys"]
+
+    def get_table(self, table_name):
+        """
+        Return the catalog row for a table, or None if it doesn't exist.
+        """
+        return self.tables.get(table_name)
+
+    def open_tree(self, table_name):
+        """
+        Return the B-Tree holding a table's rows.
+        """
+        return BTree(self.pager, self.tables[table_name]["root_page"])
@@ -1,62 +1,341 @@
 """
 The Executor (Glue Layer):
 Takes the parsed dict from the parser and calls the right B-Tree operation.
-Connects parser, btree, and pager.
+Connects parser, catalog, btree, and pager.
 """
-from core.pager import Pager
-from core.btree import BTree
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from core.pager import PAGE_SIZE, Pager
+from core.aggregate import aggregate_rows, finalize, init_states
+from core.backup import Backup
+from core.catalog import Catalog
+from core.join import hash_join, index_nested_loop_join, is_tree_key
+from core.parallel import parallel_scan
+from core.planner import explain, plan_select
+from core.predicate import row_matches
+from core.rowcache import DEFAULT_ROW_CACHE_BYTES, RowCache
+from core.sorter import SORT_MEMORY_BUDGET, sort_key, sort_rows
+from core.stats import analyze_table
+from sql.parser import count_params
+from core import vector
 
 class Executor:
-    def __init__(self, db_file: str):
-        self.pager = Pager(db_file)
-        self.btree = BTree(self.pager)
+    def __init__(self, db_file: str, sort_memory_budget: int = SORT_MEMORY_BUDGET, parallelism: int = 1,
+                 compression: str | None = None, row_cache_bytes: int = DEFAULT_ROW_CACHE_BYTES,
+                 bloom_fp_rate: float | None = None, page_size: int = PAGE_SIZE):
+        self.db_file = db_file
+        # `compression` ("zlib" or "lzma") and `page_size` apply when the database file is created
+        self.pager = Pager(db_file, compression=compression, page_size=page_size)
+        try:
+            self.catalog = Catalog(self.pager)
+        except ValueError:
+            self.pager.close()
+            raise
+        self.sort_memory_budget = sort_memory_budget
+        # Worker processes a full-table scan may be split across; 1 keeps scans serial
+        self.parallelism = parallelism
+        self._pool = None
+        # Decoded rows for primary key lookups; every write below keeps it up to date
+        self.row_cache = RowCache(row_cache_bytes)
+        # With a target false-positive rate, every table gets a Bloom filter over its primary keys.
+        # Tables that already have one keep it up to date either way.
+        if bloom_fp_rate is not None and not 0 < bloom_fp_rate < 1:
+            raise ValueError(f"Bloom filter false-positive rate must be between 0 and 1, got {bloom_fp_rate}.")
+        self.bloom_fp_rate = bloom_fp_rate
+        if bloom_fp_rate is not None:
+            for table_name in self.catalog.tables:
+                if table_name not in self.catalog.blooms:
+                    self.catalog.create_bloom(table_name, bloom_fp_rate)
 
     def execute(self, parsed_stmt: dict):
         stmt_type = parsed_stmt.get("type")
+        if count_params(parsed_stmt):
+            return "Error: Statement has unbound ? parameters."
 
         if stmt_type == "CREATE":
-            # For this simple clone, we don't strictly enforce schema
-            # We just acknowledge it was created.
-            return f"Table {parsed_stmt['table']} created."
+            try:
+                self.catalog.create_table(parsed_stmt["table"], parsed_stmt["columns"])
+                if self.bloom_fp_rate is not None:
+                    self.catalog.create_bloom(parsed_stmt["table"], self.bloom_fp_rate)
+                return f"Table {parsed_stmt['table']} created."
+            except Exception as e:
+                return f"Error: {e}"
 
         elif stmt_type == "INSERT":
             table_name = parsed_stmt["table"]
             values = parsed_stmt["values"]
-            
-            # We assume the first value is the primary key (id) for our BTree
+
+            table = self.catalog.get_table(table_name)
+            if table is None:
+                return f"Error: Table {table_name} does not exist."
+            if len(values) != len(table["columns"]):
+                return f"Error: Table {table_name} has {len(table['columns'])} columns but {len(values)} values were supplied."
+
+            # The first column is the primary key for our BTree
             pk = values[0]
-            
-            # We'll just store the raw values array as the row dict for simplicity in the MVP
-            # A real DB would map values to column names using the schema
+            if not is_tree_key(pk):
+                return f"Error: Primary key must be a non-negative integer, got {pk!r}."
+
+            # We store the raw values array as the row dict; the catalog maps positions to column names
             row_dict = {"values": values}
-            
+
             try:
-                self.btree.insert(pk, row_dict)
+                self.catalog.open_tree(table_name).insert(pk, row_dict)
+                self.row_cache.invalidate(table_name, pk)
+                # Counted as soon as the row is in the tree, whatever happens after
+                self.catalog.count_rows(table_name, 1)
+                self.catalog.bloom_add(table_name, pk)
                 return f"Inserted 1 row into {table_name}."
             except Exception as e:
                 return f"Error: {e}"
 
         elif stmt_type == "SELECT":
-            where_clause = parsed_stmt.get("where")
-            
-            results = []
-            if where_clause:
-                # We only support searching by primary key (id) for now
-                if where_clause["col"] == "id" and where_clause["op"] == "=":
-                    pk = where_clause["val"]
-                    row = self.btree.search(pk)
-                    if row:
-                        results.append(row)
-                else:
-                    return f"Error: Only WHERE id = X is supported."
-            else:
-                # Traverse all records
-                for row in self.btree.traverse():
-                    results.append(row)
-                    
-            return results
+            try:
+                plan = plan_select(parsed_stmt, self.catalog, self.parallelism)
+            except ValueError as e:
+                return f"Error: {e}"
+            return list(self._run_plan(plan))
+
+        elif stmt_type == "EXPLAIN":
+            if parsed_stmt["stmt"].get("type") != "SELECT":
+                return "Error: Only SELECT statements can be explained."
+            try:
+                plan = plan_select(parsed_stmt["stmt"], self.catalog, self.parallelism)
+            except ValueError as e:
+                return f"Error: {e}"
+            return [{"values": [line]} for line in explain(plan, self.sort_memory_budget)]
+
+        elif stmt_type == "DELETE":
+            try:
+                rows = self._matching_rows(parsed_stmt)
+            except ValueError as e:
+                return f"Error: {e}"
+
+            btree = self.catalog.open_tree(parsed_stmt["table"])
+            for row in rows:
+                btree.delete(row["values"][0])
+                self.row_cache.invalidate(parsed_stmt["table"], row["values"][0])
+            if rows:
+                self.catalog.count_rows(parsed_stmt["table"], -len(rows))
+            return f"Deleted {len(rows)} row(s) from {parsed_stmt['table']}."
+
+        elif stmt_type == "UPDATE":
+            table_name = parsed_stmt["table"]
+            try:
+                rows = self._matching_rows(parsed_stmt)
+            except ValueError as e:
+                return f"Error: {e}"
+
+            columns = self.catalog.get_table(table_name)["columns"]
+            assignments = []
+            for col, val in parsed_stmt["set"].items():
+                if col not in columns:
+                    return f"Error: Unknown column {col}."
+                assignments.append((columns.index(col), val))
+
+            btree = self.catalog.open_tree(table_name)
+            new_pks = {val for col_index, val in assignments if col_index == 0}
+            if new_pks:
+                # Check the new primary key up front so a failed UPDATE changes nothing
+                new_pk = new_pks.pop()
+                if not is_tree_key(new_pk):
+                    return f"Error: Primary key must be a non-negative integer, got {new_pk!r}."
+                if len(rows) > 1:
+                    return "Error: Duplicate keys are not supported."
+                if rows and rows[0]["values"][0] != new_pk and btree.search(new_pk) is not None:
+                    return "Error: Duplicate keys are not supported."
+
+            updates = []
+            for row in rows:
+                values = list(row["values"])
+                for col_index, val in assignments:
+                    values[col_index] = val
+                updates.append((row["values"][0], values))
+            try:
+                # Every new row must fit before any is written, so a failed UPDATE changes nothing
+                for _, values in updates:
+                    btree.check_row({"values": values})
+            except ValueError as e:
+                return f"Error: {e}"
+
+            try:
+                for old_pk, values in updates:
+                    if values[0] == old_pk:
+                        # Rewritten in place when the new payload still fits in the leaf
+                        btree.update(old_pk, {"values": values})
+                        self.row_cache.put(table_name, old_pk, {"values": values})
+                    else:
+                        btree.delete(old_pk)
+                        btree.insert(values[0], {"values": values})
+                        self.row_cache.invalidate(table_name, old_pk)
+                        self.row_cache.invalidate(table_name, values[0])
+                        self.catalog.bloom_add(table_name, values[0])
+            except Exception as e:
+                return f"Error: {e}"
+            finally:
+                if rows:
+                    # Same number of rows, but a rewrite can still split or merge nodes
+                    self.catalog.count_rows(table_name, 0)
+            return f"Updated {len(rows)} row(s) in {table_name}."
+
+        elif stmt_type == "ANALYZE":
+            table_names = [parsed_stmt["table"]] if parsed_stmt.get("table") else list(self.catalog.tables)
+            for table_name in table_names:
+                table = self.catalog.get_table(table_name)
+                if table is None:
+                    return f"Error: Table {table_name} does not exist."
+                stats = analyze_table(self.catalog.open_tree(table_name), table["columns"])
+                bloom = self.catalog.blooms.get(table_name)
+                if bloom is not None:
+                    # Rebuilding drops the bits of deleted keys; report the filter as it was used
+                    stats["bloom"] = bloom.report()
+                    self.catalog.create_bloom(table_name, bloom.meta["fp_rate"])
+                try:
+                    self.catalog.set_stats(table_name, stats)
+                except ValueError as e:
+                    return f"Error: {e}"
+            return f"Analyzed {len(table_names)} table(s)."
 
         return "Error: Unknown statement type."
-        
+
+    def _matching_rows(self, parsed_stmt):
+        """
+        Rows of a single table matching a DELETE/UPDATE's WHERE, read with the same
+        access path a SELECT would use. Collected up front so the tree isn't
+        modified while it is being walked.
+        """
+        plan = plan_select({"table": parsed_stmt["table"], "where": parsed_stmt.get("where")}, self.catalog)
+        return list(self._read_access(plan["scan"]))
+
+    def _run_plan(self, plan):
+        aggregates = plan["aggregates"]
+        if plan["header_count"]:
+            states = init_states(aggregates)
+            for state in states:
+                state[0] = self.catalog.row_count(plan["scan"]["table"])
+            return self._aggregate_result(states, plan)
+
+        # Vectorized aggregates need the width of the table's rows to build column batches
+        num_columns = len(self.catalog.get_table(plan["scan"]["table"])["columns"]) if plan["vectorized"] else 0
+        if plan["parallel"] > 1:
+            result = parallel_scan(self._get_pool(), self.db_file, self.catalog.open_tree(plan["scan"]["table"]),
+                                   plan["parallel"], plan["scan"], aggregates, num_columns)
+            if result is not None:
+                if aggregates:
+                    return self._aggregate_result(result, plan)
+                return self._order_and_limit(result, plan)
+
+        if plan["vectorized"]:
+            access = plan["scan"]
+            states = init_states(aggregates)
+            for columns, mask in vector.scan_batches(self.catalog.open_tree(access["table"]), num_columns, access):
+                vector.accumulate_batch(states, aggregates, columns, mask)
+            return self._aggregate_result(states, plan)
+
+        rows = self._read_access(plan["scan"])
+
+        join = plan["join"]
+        if join and join["strategy"] == "INDEX_NESTED_LOOP":
+            inner_btree = self.catalog.open_tree(join["inner"])
+            inner_search = lambda key: self._search(join["inner"], inner_btree, key)
+            rows = index_nested_loop_join(rows, join["outer_col"], inner_search, join["outer_is_left"],
+                                          join["inner_filters"])
+        elif join:
+            build_rows = self._read_access(join["build"])
+            rows = hash_join(build_rows, join["build_col"], rows, join["probe_col"], join["probe_is_left"])
+
+        if aggregates:
+            return self._aggregate_result(aggregate_rows(rows, aggregates), plan)
+        return self._order_and_limit(rows, plan)
+
+    def scan_columns(self, table_name, where=None, batch_size=vector.BATCH_SIZE):
+        """
+        Batch scan API for analytic callers: yield {column name: array} per batch
+        of rows matching `where` (a parsed WHERE dict), numeric columns as NumPy arrays.
+        Raises ValueError if the table doesn't exist or NumPy isn't installed.
+        """
+        if not vector.available():
+            raise ValueError("Column batch scans need NumPy.")
+        access = plan_select({"table": table_name, "where": where}, self.catalog)["scan"]
+        if access["type"] == "SEARCH":
+            # A single key is just a one-key range
+            if not is_tree_key(access["key"]):
+                return
+            access = dict(access, low=access["key"], high=access["key"], reverse=False)
+
+        names = self.catalog.get_table(table_name)["columns"]
+        btree = self.catalog.open_tree(table_name)
+        for columns, mask in vector.scan_batches(btree, len(names), access, batch_size):
+            if mask.any():
+                yield {name: column[mask] for name, column in zip(names, columns)}
+
+    def _aggregate_result(self, states, plan):
+        rows = [{"values": finalize(states, plan["aggregates"])}]
+        if plan["limit"] is not None:
+            return rows[:plan["limit"]]
+        return rows
+
+    def _order_and_limit(self, rows, plan):
+        sort = plan["sort"]
+        limit = plan["limit"]
+        if sort:
+            col_index = sort["col_index"]
+            rows = sort_rows(
+                rows,
+                key=lambda row: sort_key(row["values"][col_index]),
+                reverse=sort["desc"],
+                limit=limit,
+                memory_budget=self.sort_memory_budget,
+            )
+
+        if limit is not None:
+            rows = itertools.islice(rows, limit)
+        return rows
+
+    def _read_access(self, access):
+        btree = self.catalog.open_tree(access["table"])
+        if access["type"] == "SEARCH":
+            if not is_tree_key(access["key"]):
+                return []
+            row = self._search(access["table"], btree, access["key"])
+            rows = [row] if row else []
+        elif access["type"] == "RANGE":
+            rows = btree.traverse(reverse=access["reverse"], low=access["low"], high=access["high"])
+        else:
+            rows = btree.traverse(reverse=access["reverse"])
+
+        filters = access["filters"]
+        if filters:
+            return (row for row in rows if row_matches(row, filters))
+        return rows
+
+    def _search(self, table_name, btree, key):
+        """
+        Primary key lookup: the Bloom filter rules out absent keys, the row cache serves hot ones.
+        """
+        bloom = self.catalog.blooms.get(table_name)
+        if bloom is not None and not bloom.might_contain(key):
+            return None
+        row = self.row_cache.search(table_name, btree, key)
+        if row is None and bloom is not None:
+            bloom.false_positives += 1
+        return row
+
+    def backup(self, dest_path, base_path=None):
+        """
+        Start an online backup of this database; drive it with `step()` between statements.
+        With `base_path` it is incremental on top of that earlier backup.
+        """
+        self.catalog.save_bloom_counts()
+        return Backup(self.pager, dest_path, base_path)
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.parallelism)
+        return self._pool
+
     def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+        self.catalog.save_bloom_counts()
         self.pager.close()
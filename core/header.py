@@ -0,0 +1,95 @@
+"""
+Database Header:
+Pages 0 and 1 hold the database header: the format version, the page size, the
+catalog's root page, the head of the free page list, and for every table its
+root page, row count and tree depth. Opening a database and asking how big a
+table is then costs one page read instead of a walk over the file.
+
+The two pages take turns: each commit writes the page the previous commit
+didn't, with a higher sequence number and a CRC32 over its contents. A write
+torn by a crash leaves the other copy intact, and opening picks the newest copy
+whose checksum holds.
+"""
+import struct
+import zlib
+
+HEADER_MAGIC = b"SQLCLONE-DB\x00\x00\x00\x00\x00"
+FORMAT_VERSION = 1
+HEADER_PAGES = 2
+# magic, format version, page size, sequence, catalog root, freelist head, free page count, table count
+HEADER_FIELDS = struct.Struct('>16sHIQIIIH')
+# table id, root page, row count, tree depth
+TABLE_ENTRY = struct.Struct('>IIQH')
+CRC = struct.Struct('>I')
+
+MIN_PAGE_SIZE = 1024
+MAX_PAGE_SIZE = 65536
+
+def check_page_size(page_size):
+    """
+    Raises ValueError unless `page_size` is a power of two the B-Tree can address.
+    """
+    if (not isinstance(page_size, int) or page_size & (page_size - 1)
+            or not MIN_PAGE_SIZE <= page_size <= MAX_PAGE_SIZE):
+        raise ValueError(f"Page size must be a power of two between {MIN_PAGE_SIZE} and {MAX_PAGE_SIZE}, "
+                         f"got {page_size!r}.")
+
+def read_page_size(data):
+    """
+    The page size recorded in the first bytes of a header page, or None if `data` doesn't start with one.
+    """
+    if len(data) < HEADER_FIELDS.size or not data.startswith(HEADER_MAGIC):
+        return None
+    return HEADER_FIELDS.unpack_from(data)[2]
+
+class DatabaseHeader:
+    def __init__(self, page_size, catalog_root=HEADER_PAGES, sequence=0, freelist_head=0, freelist_count=0,
+                 tables=None):
+        self.page_size = page_size
+        self.catalog_root = catalog_root
+        self.sequence = sequence
+        # Free pages form a linked list through their first four bytes; 0 ends it
+        self.freelist_head = freelist_head
+        self.freelist_count = freelist_count
+        # table id -> [root page, row count, depth]
+        self.tables: dict[int, list[int]] = tables if tables is not None else {}
+
+    @staticmethod
+    def max_tables(page_size):
+        return (page_size - HEADER_FIELDS.size - CRC.size) // TABLE_ENTRY.size
+
+    def pack(self):
+        """
+        The header as one page, checksum last.
+        """
+        page = bytearray(self.page_size)
+        HEADER_FIELDS.pack_into(page, 0, HEADER_MAGIC, FORMAT_VERSION, self.page_size, self.sequence,
+                                self.catalog_root, self.freelist_head, self.freelist_count, len(self.tables))
+        offset = HEADER_FIELDS.size
+        for table_id, (root_page, row_count, depth) in sorted(self.tables.items()):
+            TABLE_ENTRY.pack_into(page, offset, table_id, root_page, row_count, depth)
+            offset += TABLE_ENTRY.size
+        CRC.pack_into(page, self.page_size - CRC.size, zlib.crc32(page[:self.page_size - CRC.size]))
+        return page
+
+    @classmethod
+    def unpack(cls, page):
+        """
+        Parse a header page. Returns None if it isn't one or its checksum doesn't match.
+        Raises ValueError for a header written by a newer format version.
+        """
+        if read_page_size(page) != len(page):
+            return None
+        (crc,) = CRC.unpack_from(page, len(page) - CRC.size)
+        if zlib.crc32(page[:len(page) - CRC.size]) != crc:
+            return None
+        _, version, page_size, sequence, catalog_root, freelist_head, freelist_count, num_tables = \
+            HEADER_FIELDS.unpack_from(page)
+        if version > FORMAT_VERSION:
+            raise ValueError(f"Database format version {version} is newer than this build supports.")
+
+        tables = {}
+        for i in range(num_tables):
+            table_id, root_page, row_count, depth = TABLE_ENTRY.unpack_from(page, HEADER_FIELDS.size + i * TABLE_ENTRY.size)
+            tables[table_id] = [root_page, row_count, depth]
+        return cls(page_size, catalog_root, sequence, freelist_head, freelist_count, tables)
@@ -0,0 +1,51 @@
+"""
+Joins:
+The two physical strategies for `a JOIN b ON a.x = b.y`.
+- Index nested loop: one side is joined on its primary key, so stream the other
+  side and probe the other table's primary key for each row.
+- Hash join: build a hash table on one side's join column, then stream the
+  other side past it.
+Joined rows always hold the FROM table's values first, then the JOIN table's.
+"""
+from core.predicate import row_matches
+
+def is_tree_key(value):
+    """
+    B-Tree keys are unsigned 32-bit ints, so nothing else can ever match a primary key.
+    """
+    return isinstance(value, int) and 0 <= value <= 0xFFFFFFFF
+
+def _combine(row, other_row, row_is_left):
+    if row_is_left:
+        return {"values": row["values"] + other_row["values"]}
+    return {"values": other_row["values"] + row["values"]}
+
+def index_nested_loop_join(outer_rows, outer_col, inner_search, outer_is_left=True, inner_filters=()):
+    """
+    For every outer row, look up the inner row whose primary key equals the outer join column.
+    `inner_search(key)` does the lookup (`BTree.search`, or the executor's row cache).
+    `inner_filters` are the inner table's WHERE conditions, checked after each probe.
+    """
+    for outer_row in outer_rows:
+        key = outer_row["values"][outer_col]
+        if not is_tree_key(key):
+            continue
+        inner_row = inner_search(key)
+        if inner_row is not None and row_matches(inner_row, inner_filters):
+            yield _combine(outer_row, inner_row, outer_is_left)
+
+def hash_join(build_rows, build_col, probe_rows, probe_col, probe_is_left=True):
+    """
+    Hash the build side on its join column, then stream the probe side through it.
+    Output follows the probe side's order.
+    """
+    buckets: dict = {}
+    for row in build_rows:
+        key = row["values"][build_col]
+        # NULL never equals anything, not even another NULL
+        if key is not None:
+            buckets.setdefault(key, []).append(row)
+
+    for probe_row in probe_rows:
+        for build_row in buckets.get(probe_row["values"][probe_col], ()):
+            yield _combine(probe_row, build_row, probe_is_left)
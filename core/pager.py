@@ -1,72 +1,443 @@
 """
 Pager (Your Disk Manager):
-Reads and writes 4KB pages to/from the .db file.
+Reads and writes fixed-size pages (4KB unless the database was created with
+another size) to/from the .db file. A database made through the Catalog starts
+with a header (see core/header.py) recording its page size and the free page
+list, so pages freed in one session are reused in the next.
+
+Optionally the pages can be stored compressed (zlib or lzma). A compressed file
+starts with a one-sector header, followed by variable-sized extents: each extent
+holds one page's compressed bytes behind a small header naming the page, so the
+page-number-to-extent map can be rebuilt by walking the file on open.
+Compressed databases keep a two-tier cache: a bounded LRU of decompressed "hot"
+pages the B-Tree works on, and behind it a larger tier of compressed pages that
+can be brought back without touching the disk.
+
+Once a database has been backed up, the pager also keeps each page's last write
+LSN in a "-lsn" file next to it, so incremental backups work across reopens.
 """
 
+import lzma
 import os
+import struct
+import zlib
+from collections import OrderedDict
+from core.header import HEADER_FIELDS, HEADER_PAGES, DatabaseHeader, check_page_size, read_page_size
 
 PAGE_SIZE = 4096
 
+# Compressed files begin with the magic, then one byte naming the compressor and the page size
+# (0 in files written before page sizes were configurable, meaning PAGE_SIZE)
+COMPRESSED_MAGIC = b"SQLCLONE-PAGEZ\x00"
+COMPRESSED_PAGE_SIZE = struct.Struct('>I')
+COMPRESSORS = {
+    "zlib": (1, zlib.compress, zlib.decompress),
+    "lzma": (2, lzma.compress, lzma.decompress),
+}
+# Extents are allocated in sectors: [page num][write sequence][stored length][sectors] + data
+SECTOR_SIZE = 256
+EXTENT_HEADER = struct.Struct('>IIHH')
+# Stored length of a page kept uncompressed, which at 64KB pages wouldn't fit in the length field
+RAW_EXTENT = 0
+FREE_EXTENT = 0xFFFFFFFF
+# One spare sector per extent, so a page that grows a little is rewritten in place
+EXTENT_SLACK_SECTORS = 1
+
+DEFAULT_HOT_PAGES = 2048
+# A B-Tree operation writes to a page within a few fetches of reading it, at each
+# level of the tree. Evicted pages are written back, so the hot tier only needs to
+# hold that many pages per level; 8 levels covers any tree of uint32 page numbers.
+MIN_HOT_PAGES = 8 * 4
+DEFAULT_COLD_BYTES = 8 * 1024 * 1024
+
+# The "-lsn" change-tracking file: magic, [LSN epoch][last LSN][closed cleanly], then one LSN per page
+LSN_MAGIC = b"SQLCLONE-LSNMAP\x00"
+LSN_HEADER = struct.Struct('>QQB')
+LSN_ENTRY = struct.Struct('>Q')
+
 class Pager:
-    def __init__(self, filename):
+    def __init__(self, filename, read_only=False, compression=None, page_size=PAGE_SIZE,
+                 cache_pages=DEFAULT_HOT_PAGES, cold_cache_bytes=DEFAULT_COLD_BYTES):
         """
         Open the database file. If it doesn't exist, it will be created.
         We keep a dictionary `pages` as our memory cache.
+        A read-only pager (e.g. in a parallel scan worker) never writes to the file.
+        `compression` ("zlib" or "lzma") and `page_size` only matter when creating
+        a new file; an existing file is always opened with its own.
         """
+        if compression is not None and compression not in COMPRESSORS:
+            raise ValueError(f"Unknown page compression {compression!r}.")
+        if cache_pages < MIN_HOT_PAGES:
+            raise ValueError(f"cache_pages must be at least {MIN_HOT_PAGES}, got {cache_pages}.")
+        check_page_size(page_size)
         self.filename = filename
-        
-        # open the file in binary read/write mode ("r+b"). 
+        self.read_only = read_only
+        self.page_size = page_size
+        # The database header, once there is one: see `create_header`
+        self.header = None
+
+        # open the file in binary read/write mode ("r+b").
         # If it doesn't exist, we create it and then open it.
-        if not os.path.exists(filename):
-            open(filename, "w").close()
-            
-        self.file = open(filename, "r+b")
-        self.pages: dict[int, bytearray] = {} # the cache: page_num -> bytes
+        if read_only:
+            self.file = open(filename, "rb")
+        else:
+            if not os.path.exists(filename):
+                open(filename, "w").close()
+            self.file = open(filename, "r+b")
+        self.pages: OrderedDict[int, bytearray] = OrderedDict() # the cache: page_num -> bytes
+        # Pages given back by the B-Tree (e.g. after a merge), reused before the file grows.
+        # Files with a header keep this list on disk instead; in the others it only
+        # lives in memory, so pages freed in an earlier session stay unused.
+        self.free_pages: list[int] = []
+        # CRC of each cached page as last read or written, to tell clean pages from dirty ones
+        self._crcs: dict[int, int] = {}
+        # Change tracking for incremental backups: every page write takes the next LSN.
+        # A new epoch tells backups that LSNs from before it can't be trusted.
+        self.lsn = 0
+        self.page_lsns: dict[int, int] = {} # pages written since the open
+        self._stored_lsns = b"" # every page's LSN as of the last clean close
+        self.lsn_epoch = int.from_bytes(os.urandom(8), 'big')
+        self.lsn_path = filename + "-lsn"
+        self.tracking_lsns = False
+        if not read_only and os.path.exists(self.lsn_path):
+            self._load_lsns(fresh=os.fstat(self.file.fileno()).st_size == 0)
 
         # calculate how many pages currently exist in the file
         self.file.seek(0, os.SEEK_END)
-        self.num_pages = self.file.tell() // PAGE_SIZE
+        file_size = self.file.tell()
+        self.file.seek(0)
+        head = self.file.read(max(len(COMPRESSED_MAGIC) + 1 + COMPRESSED_PAGE_SIZE.size, HEADER_FIELDS.size))
+
+        self.compression = None
+        if head[:len(COMPRESSED_MAGIC)] == COMPRESSED_MAGIC:
+            self.compression = next(name for name, (code, _, _) in COMPRESSORS.items()
+                                    if code == head[len(COMPRESSED_MAGIC)])
+            self.page_size = COMPRESSED_PAGE_SIZE.unpack_from(head, len(COMPRESSED_MAGIC) + 1)[0] or PAGE_SIZE
+        elif compression is not None:
+            if file_size > 0 or read_only:
+                raise ValueError(f"{filename} is not a compressed database.")
+            self.compression = compression
+            header = (COMPRESSED_MAGIC + bytes([COMPRESSORS[compression][0]])
+                      + COMPRESSED_PAGE_SIZE.pack(self.page_size))
+            self.file.write(header.ljust(SECTOR_SIZE, b"\x00"))
+            self.file.flush()
+            file_size = SECTOR_SIZE
+        elif file_size > 0:
+            # Files without a header predate it and always use the default page size
+            self.page_size = read_page_size(head) or PAGE_SIZE
+
+        if self.compression is None:
+            self.num_pages = file_size // self.page_size
+            self._load_header()
+            return
+
+        _, self._compress, self._decompress = COMPRESSORS[self.compression]
+        self.cache_pages = cache_pages
+        self.cold_cache_bytes = cold_cache_bytes
+        # Compressed tier: page_num -> the exact bytes stored in its extent
+        self.cold_pages: OrderedDict[int, bytes] = OrderedDict()
+        self.cold_bytes = 0
+        # page_num -> (offset, sectors, write sequence) of its live extent
+        self.extents: dict[int, tuple[int, int, int]] = {}
+        self.free_extents: list[tuple[int, int]] = []
+        self.write_seq = 0
+        self.file_end = file_size
+        self._load_extents()
+        self._load_header()
+
+    def _load_header(self):
+        """
+        Pick up the database header if the file has one: the newer of its two
+        copies that passes its checksum.
+        """
+        if self.num_pages < HEADER_PAGES or read_page_size(self.get_page(0)) is None:
+            return
+        copies = [DatabaseHeader.unpack(self.get_page(page_num)) for page_num in range(HEADER_PAGES)]
+        copies = [copy for copy in copies if copy is not None and copy.page_size == self.page_size]
+        if not copies:
+            raise ValueError(f"{self.filename} has a damaged database header.")
+        self.header = max(copies, key=lambda copy: copy.sequence)
+
+    def create_header(self):
+        """
+        Lay out the header pages at the start of a new, empty database.
+        """
+        assert self.num_pages == 0, "The header can only be added to an empty database."
+        for page_num in range(HEADER_PAGES):
+            self.get_page(page_num)
+        self.header = DatabaseHeader(self.page_size)
+        # Write both copies, so either can be trusted from the start
+        for _ in range(HEADER_PAGES):
+            self.commit_header()
+
+    def commit_header(self):
+        """
+        Write the in-memory header over the older of its two copies.
+        """
+        if self.header is None or self.read_only:
+            return
+        self.header.sequence += 1
+        page_num = self.header.sequence % HEADER_PAGES
+        self.get_page(page_num)[:] = self.header.pack()
+        self.flush_page(page_num)
+
+    def _load_extents(self):
+        """
+        Rebuild the page-to-extent map by walking every extent header in the file.
+        If a crash left two extents for the same page, the later write wins.
+        """
+        offset = SECTOR_SIZE
+        while offset + EXTENT_HEADER.size <= self.file_end:
+            self.file.seek(offset)
+            page_num, seq, _, sectors = EXTENT_HEADER.unpack(self.file.read(EXTENT_HEADER.size))
+            if sectors == 0:
+                # A torn append at the end of the file
+                break
+            if page_num == FREE_EXTENT:
+                self.free_extents.append((offset, sectors))
+            else:
+                old = self.extents.get(page_num)
+                if old is None or old[2] < seq:
+                    if old is not None:
+                        self.free_extents.append((old[0], old[1]))
+                    self.extents[page_num] = (offset, sectors, seq)
+                else:
+                    self.free_extents.append((offset, sectors))
+                self.write_seq = max(self.write_seq, seq)
+            offset += sectors * SECTOR_SIZE
+        self.file_end = offset
+        self.num_pages = max(self.extents, default=-1) + 1
 
     def get_page(self, page_num):
         """
-        Get a page. First check the memory cache. 
+        Get a page. First check the memory cache.
         If it's missing, read it from disk.
         """
         # If it's already in memory, just return it
         if page_num in self.pages:
+            if self.compression:
+                self.pages.move_to_end(page_num)
             return self.pages[page_num]
 
         # Otherwise, calculate where it sits on disk
-        offset = page_num * PAGE_SIZE
-        
+        offset = page_num * self.page_size
+
         # We might be asking for a brand new page at the very end of the file
         if page_num >= self.num_pages:
             # Create a brand new empty page filled with 0s
-            page = bytearray(PAGE_SIZE)
+            page = bytearray(self.page_size)
             self.num_pages += 1
+        elif self.compression:
+            page = self._read_compressed(page_num)
         else:
-            # Seek to the correct offset and read 4KB
+            # Seek to the correct offset and read one page
             self.file.seek(offset)
-            page = bytearray(self.file.read(PAGE_SIZE))
-            
+            page = bytearray(self.file.read(self.page_size))
+            self._crcs[page_num] = zlib.crc32(page)
+
         # Cache it for next time
         self.pages[page_num] = page
+        if self.compression:
+            self._crcs[page_num] = zlib.crc32(page)
+            self._evict_hot_pages()
         return page
 
+    def _read_compressed(self, page_num):
+        """
+        Decompress a page from the compressed tier, or failing that from its extent.
+        """
+        data = self.cold_pages.pop(page_num, None)
+        if data is not None:
+            self.cold_bytes -= len(data)
+        elif page_num in self.extents:
+            offset = self.extents[page_num][0]
+            self.file.seek(offset)
+            _, _, length, _ = EXTENT_HEADER.unpack(self.file.read(EXTENT_HEADER.size))
+            data = self.file.read(length if length != RAW_EXTENT else self.page_size)
+        else:
+            # Allocated in an earlier session but never written
+            return bytearray(self.page_size)
+
+        # Pages that don't compress are stored as they are
+        if len(data) == self.page_size:
+            return bytearray(data)
+        return bytearray(self._decompress(data))
+
+    def _evict_hot_pages(self):
+        """
+        Move least recently used pages out of the hot tier, writing back any that changed.
+        """
+        while len(self.pages) > self.cache_pages:
+            page_num, page = self.pages.popitem(last=False)
+            data = self._encode(page)
+            if self._crcs.pop(page_num) != zlib.crc32(page) or page_num not in self.extents:
+                self._write_extent(page_num, data)
+            self.cold_pages[page_num] = data
+            self.cold_bytes += len(data)
+            while self.cold_bytes > self.cold_cache_bytes:
+                _, dropped = self.cold_pages.popitem(last=False)
+                self.cold_bytes -= len(dropped)
+
+    def _encode(self, page):
+        data = self._compress(page)
+        return data if len(data) < self.page_size else bytes(page)
+
+    def _write_extent(self, page_num, data):
+        """
+        Store a page's bytes, in place if its extent is big enough, otherwise in a
+        free extent or at the end of the file. The old extent is freed only after
+        the new one is written.
+        """
+        needed = -(-(EXTENT_HEADER.size + len(data)) // SECTOR_SIZE)
+        old = self.extents.get(page_num)
+        if old is not None and old[1] >= needed:
+            offset, sectors = old[0], old[1]
+            old = None
+        else:
+            fits = [extent for extent in self.free_extents if extent[1] >= needed]
+            if fits:
+                offset, sectors = min(fits, key=lambda extent: extent[1])
+                self.free_extents.remove((offset, sectors))
+            else:
+                offset, sectors = self.file_end, needed + EXTENT_SLACK_SECTORS
+                self.file_end += sectors * SECTOR_SIZE
+
+        self._mark_written(page_num)
+        self.write_seq += 1
+        length = RAW_EXTENT if len(data) == self.page_size else len(data)
+        record = EXTENT_HEADER.pack(page_num, self.write_seq, length, sectors) + data
+        self.file.seek(offset)
+        self.file.write(record.ljust(sectors * SECTOR_SIZE, b"\x00"))
+        if old is not None:
+            self.file.seek(old[0])
+            self.file.write(EXTENT_HEADER.pack(FREE_EXTENT, 0, 0, old[1]))
+            self.free_extents.append((old[0], old[1]))
+        self.file.flush()
+        self.extents[page_num] = (offset, sectors, self.write_seq)
+
+    def allocate_page(self):
+        """
+        Hand out a zeroed page for a new node, reusing a freed page if there is one.
+        """
+        if self.header is not None and self.header.freelist_head:
+            page_num = self.header.freelist_head
+            page = self.get_page(page_num)
+            self.header.freelist_head = struct.unpack('>I', page[:4])[0]
+            self.header.freelist_count -= 1
+            page[:] = bytearray(self.page_size)
+            self.commit_header()
+            return page_num
+        if self.free_pages:
+            page_num = self.free_pages.pop()
+            page = self.get_page(page_num)
+            page[:] = bytearray(self.page_size)
+            return page_num
+
+        page_num = self.num_pages
+        self.get_page(page_num)
+        return page_num
+
+    def free_page(self, page_num):
+        """
+        Take back a page that no longer belongs to any tree.
+        """
+        page = self.get_page(page_num)
+        page[:] = bytearray(self.page_size)
+        if self.header is None:
+            self.flush_page(page_num)
+            self.free_pages.append(page_num)
+            return
+
+        # Link the page in front of the free list before the header points at it
+        page[:4] = struct.pack('>I', self.header.freelist_head)
+        self.flush_page(page_num)
+        self.header.freelist_head = page_num
+        self.header.freelist_count += 1
+        self.commit_header()
+
     def flush_page(self, page_num):
         """
         Write a specific page from memory back to the disk.
         """
+        if self.read_only:
+            return
         if page_num in self.pages:
             page = self.pages[page_num]
-            assert len(page) == PAGE_SIZE, f"Page {page_num} size is {len(page)}, expected {PAGE_SIZE}"
-            
-            offset = page_num * PAGE_SIZE
+            assert len(page) == self.page_size, f"Page {page_num} size is {len(page)}, expected {self.page_size}"
+
+            if self.compression:
+                # Unchanged pages are skipped, so closing doesn't rewrite every extent
+                crc = zlib.crc32(page)
+                if crc != self._crcs.get(page_num) or page_num not in self.extents:
+                    self._write_extent(page_num, self._encode(page))
+                    self._crcs[page_num] = crc
+                return
+
+            # Likewise for raw pages, so only real changes take an LSN
+            crc = zlib.crc32(page)
+            if crc == self._crcs.get(page_num):
+                return
+            self._crcs[page_num] = crc
+            self._mark_written(page_num)
+            offset = page_num * self.page_size
             self.file.seek(offset)
             self.file.write(page)
             # Ask the OS to actually write to disk immediately (optional but good)
             self.file.flush()
 
+    def _mark_written(self, page_num):
+        self.lsn += 1
+        self.page_lsns[page_num] = self.lsn
+
+    def page_lsn(self, page_num):
+        """
+        LSN of the last write to a page, or 0 if it hasn't been written since tracking began.
+        """
+        lsn = self.page_lsns.get(page_num)
+        if lsn is None and (page_num + 1) * LSN_ENTRY.size <= len(self._stored_lsns):
+            lsn = LSN_ENTRY.unpack_from(self._stored_lsns, page_num * LSN_ENTRY.size)[0]
+        return lsn or 0
+
+    def track_lsns(self):
+        """
+        Keep page LSNs in the "-lsn" file from now on (the first backup asks for
+        this). It is marked as in use until `close` saves the LSNs into it.
+        """
+        if self.tracking_lsns or self.read_only:
+            return
+        with open(self.lsn_path, "wb") as f:
+            f.write(LSN_MAGIC + LSN_HEADER.pack(self.lsn_epoch, self.lsn, 0) + self._stored_lsns)
+        self.tracking_lsns = True
+
+    def _load_lsns(self, fresh):
+        """
+        Carry on from the LSNs saved by the last clean close. A file left by a pager
+        that never closed may be missing writes, and one next to a brand new database
+        belongs to a database that is gone; either way tracking restarts in a new epoch.
+        """
+        with open(self.lsn_path, "rb") as f:
+            data = f.read()
+        header_end = len(LSN_MAGIC) + LSN_HEADER.size
+        if not fresh and data[:len(LSN_MAGIC)] == LSN_MAGIC and len(data) >= header_end:
+            epoch, lsn, clean = LSN_HEADER.unpack(data[len(LSN_MAGIC):header_end])
+            if clean:
+                self.lsn_epoch, self.lsn = epoch, lsn
+                self._stored_lsns = data[header_end:]
+        self.track_lsns()
+
+    def _save_lsns(self):
+        """
+        Write this session's LSNs into the "-lsn" file, then mark it as closed cleanly.
+        """
+        with open(self.lsn_path, "r+b") as f:
+            header_end = len(LSN_MAGIC) + LSN_HEADER.size
+            for page_num, lsn in self.page_lsns.items():
+                f.seek(header_end + page_num * LSN_ENTRY.size)
+                f.write(LSN_ENTRY.pack(lsn))
+            f.flush()
+            f.seek(0)
+            f.write(LSN_MAGIC + LSN_HEADER.pack(self.lsn_epoch, self.lsn, 1))
+
     def close(self):
         """
         Close the pager, making sure to flush all cached pages back to disk first.
@@ -74,4 +445,5 @@ class Pager:
         for page_num in self.pages.keys():
             self.flush_page(page_num)
         self.file.close()
-
+        if self.tracking_lsns:
+            self._save_lsns()
@@ -0,0 +1,101 @@
+"""
+Parallel Scan:
+Cuts a table's B-Tree into contiguous key ranges at the first or second internal
+level and scans each range in a worker process. Every worker opens its own
+read-only Pager, decodes and filters its rows locally, and sends back either the
+matching rows or partial aggregates (computed over column batches for vectorized
+plans). Ranges are handed out and collected in key order, so concatenating the
+results keeps primary key order.
+"""
+from core.aggregate import aggregate_rows, init_states, merge_states
+from core.btree import BTree
+from core.pager import Pager
+from core.predicate import row_matches
+from core.vector import accumulate_batch, scan_batches
+
+# A two-level tree needs at least this many leaves before workers are worth starting
+PARALLEL_MIN_LEAVES = 16
+
+def split_ranges(btree, parts, low=None, high=None):
+    """
+    Group the tree's subtrees into at most `parts` contiguous runs, in key order.
+    Subtrees entirely outside the inclusive [low, high] key range are dropped.
+    Returns [] when the table is too small to be worth splitting.
+    """
+    depth = btree.depth()
+    if depth < 2:
+        return []
+    subtrees = btree.subtrees(1)
+    if len(subtrees) < parts * 2 and depth > 2:
+        # Not enough children under the root to share out evenly, go one level down
+        subtrees = btree.subtrees(2)
+    elif depth == 2 and len(subtrees) < PARALLEL_MIN_LEAVES:
+        return []
+
+    page_nums = [
+        page_num for page_num, sub_low, sub_high in subtrees
+        if (low is None or sub_high is None or sub_high > low) and (high is None or sub_low is None or sub_low <= high)
+    ]
+    parts = min(parts, len(page_nums))
+    if parts < 2:
+        return []
+
+    # Contiguous runs of (nearly) equal numbers of subtrees
+    runs = []
+    for i in range(parts):
+        runs.append(page_nums[i * len(page_nums) // parts:(i + 1) * len(page_nums) // parts])
+    return runs
+
+def parallel_scan(pool, db_file, btree, parts, access, aggregates=None, num_columns=0):
+    """
+    Run a SCAN/RANGE access over worker processes from `pool`.
+    Returns the matching rows in key order (or merged aggregate states when
+    `aggregates` is given), or None if the table is too small to split.
+    Passing the table's `num_columns` with `aggregates` makes workers aggregate column batches.
+    """
+    low, high = access.get("low"), access.get("high")
+    runs = split_ranges(btree, parts, low, high)
+    if not runs:
+        return None
+
+    reverse = access.get("reverse", False)
+    if reverse:
+        runs = [list(reversed(run)) for run in reversed(runs)]
+
+    tasks = [(db_file, run, reverse, low, high, access["filters"], aggregates, num_columns)
+             for run in runs]
+    results = pool.map(_scan_worker, tasks)
+
+    if aggregates:
+        states = init_states(aggregates)
+        for partial_states in results:
+            merge_states(states, partial_states)
+        return states
+
+    rows = []
+    for chunk in results:
+        rows.extend(chunk)
+    return rows
+
+def _scan_worker(task):
+    """
+    Runs inside a worker process: scan a run of subtrees with a private read-only pager.
+    """
+    db_file, run, reverse, low, high, filters, aggregates, num_columns = task
+    pager = Pager(db_file, read_only=True)
+    try:
+        btree = BTree(pager)
+        if aggregates and num_columns:
+            access = {"low": low, "high": high, "filters": filters}
+            states = init_states(aggregates)
+            for columns, mask in scan_batches(btree, num_columns, access, page_nums=run):
+                accumulate_batch(states, aggregates, columns, mask)
+            return states
+        rows = (row for page_num in run for row in btree.traverse(page_num, reverse, low, high))
+        if filters:
+            rows = (row for row in rows if row_matches(row, filters))
+        if aggregates:
+            return aggregate_rows(rows, aggregates)
+        return list(rows)
+    finally:
+        pager.close()
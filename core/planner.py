@@ -0,0 +1,321 @@
+"""
+The Planner:
+Turns a parsed SELECT into a plan the executor can run: how each table is read
+(primary key search, primary key range seek or full scan), which join strategy
+combines them, and whether ORDER BY needs a sort at all. COUNT(*) over a whole
+table is answered from the row count kept in the database header.
+Tables that have been through ANALYZE are planned by estimated cost; the rest
+fall back to simple rules. `explain` renders a plan as readable lines for EXPLAIN.
+"""
+import math
+from core.sorter import SORT_MEMORY_BUDGET
+from core.stats import range_selectivity, selectivity, table_size
+from core import vector
+
+RANGE_OPS = ("<", "<=", ">", ">=")
+
+def plan_select(parsed_stmt, catalog, parallelism=1):
+    """
+    Build a plan dict for a SELECT. Raises ValueError if the query can't be planned.
+    `parallelism` is the most worker processes a single-table scan may use.
+    """
+    sides = [_get_table(catalog, parsed_stmt["table"])]
+    join = parsed_stmt.get("join")
+    if join:
+        sides.append(_get_table(catalog, join["table"]))
+
+    # Route every WHERE condition to the table whose column it names
+    conds_by_side: list[list] = [[] for _ in sides]
+    for cond in _conjuncts(parsed_stmt.get("where")):
+        side_num, col_index = _resolve_column(cond["col"], sides)
+        col = sides[side_num]["columns"][col_index]
+        conds_by_side[side_num].append({"col_index": col_index, "col": col, "op": cond["op"], "val": cond["val"]})
+
+    accesses = [_plan_access(side, conds) for side, conds in zip(sides, conds_by_side)]
+    cost_based = all(side.get("stats") for side in sides)
+
+    plan = {"columns": [], "scan": accesses[0], "join": None, "sort": None, "aggregates": None,
+            "limit": parsed_stmt.get("limit"), "cost_based": cost_based, "parallel": 1,
+            "vectorized": False, "header_count": False}
+    if join:
+        plan["columns"] = [f"{side['name']}.{col}" for side in sides for col in side["columns"]]
+        plan["join"] = _plan_join(sides, accesses, conds_by_side, join, cost_based)
+        if plan["join"]["strategy"] == "HASH":
+            plan["scan"] = plan["join"].pop("probe")
+        else:
+            plan["scan"] = plan["join"].pop("outer")
+    else:
+        plan["columns"] = list(sides[0]["columns"])
+
+    aggregates = parsed_stmt.get("aggregates")
+    if aggregates:
+        plan["aggregates"] = []
+        for agg in aggregates:
+            col_index = None
+            if agg["col"] != "*":
+                side_num, col_index = _resolve_column(agg["col"], sides)
+                col_index += len(sides[0]["columns"]) if side_num == 1 else 0
+            plan["aggregates"].append({"func": agg["func"], "col": agg["col"], "col_index": col_index})
+        plan["columns"] = [f"{agg['func']}({agg['col']})" for agg in aggregates]
+
+    order_by = parsed_stmt.get("order_by")
+    if order_by and not aggregates:
+        side_num, col_index = _resolve_column(order_by["col"], sides)
+        scan = plan["scan"]
+        if col_index == 0 and scan["type"] in ("SCAN", "RANGE") and scan["table"] == sides[side_num]["name"]:
+            # Rows stream out of the primary key tree already in order, so no sort is needed
+            scan["reverse"] = order_by["desc"]
+        else:
+            offset = len(sides[0]["columns"]) if side_num == 1 else 0
+            plan["sort"] = {"col": order_by["col"], "col_index": offset + col_index, "desc": order_by["desc"]}
+
+    # A LIMIT without a sort stops reading early, which a serial scan does best
+    streaming = plan["limit"] is not None and plan["sort"] is None and not aggregates
+    if parallelism > 1 and not join and plan["scan"]["type"] in ("SCAN", "RANGE") and not streaming:
+        plan["parallel"] = parallelism
+    # Aggregates over one table read column batches when NumPy is around
+    if aggregates and not join and plan["scan"]["type"] in ("SCAN", "RANGE") and vector.available():
+        plan["vectorized"] = True
+    # Counting every row of a table needs no scan at all when the header has the count
+    if (aggregates and not join and plan["scan"]["type"] == "SCAN" and not plan["scan"]["filters"]
+            and all(agg["func"] == "COUNT" and agg["col_index"] is None for agg in plan["aggregates"])
+            and catalog.row_count(sides[0]["name"]) is not None):
+        plan.update(header_count=True, parallel=1, vectorized=False)
+    return plan
+
+def _get_table(catalog, table_name):
+    table = catalog.get_table(table_name)
+    if table is None:
+        raise ValueError(f"Table {table_name} does not exist.")
+    return table
+
+def _conjuncts(where_clause):
+    if not where_clause:
+        return []
+    if where_clause["op"] == "AND":
+        return where_clause["conds"]
+    return [where_clause]
+
+def _resolve_column(name, sides):
+    """
+    Find which table a (possibly `table.`-qualified) column belongs to.
+    Returns (side number, column position).
+    """
+    if "." in name:
+        table_name, col = name.split(".", 1)
+        matches = [(i, side) for i, side in enumerate(sides) if side["name"] == table_name and col in side["columns"]]
+    else:
+        col = name
+        matches = [(i, side) for i, side in enumerate(sides) if col in side["columns"]]
+
+    if not matches:
+        raise ValueError(f"Unknown column {name}.")
+    if len(matches) > 1:
+        raise ValueError(f"Ambiguous column {name}.")
+    side_num, side = matches[0]
+    return side_num, side["columns"].index(col)
+
+def _plan_access(table, conds):
+    """
+    Cost every way of reading one table and keep the cheapest.
+    Cost is measured as pages visited plus rows decoded.
+    """
+    stats = table.get("stats")
+    rows, pages, depth = table_size(stats)
+    pk_col = table["columns"][0]
+
+    # Rows that survive every condition, whichever path reads them
+    out_rows = rows * _conds_selectivity(stats, conds)
+
+    candidates = []
+    for cond in conds:
+        if cond["col_index"] == 0 and cond["op"] == "=":
+            rest = [c for c in conds if c is not cond]
+            candidates.append(({"type": "SEARCH", "key": cond["val"]}, rest, depth + 1))
+            break
+
+    low, high, range_conds = _pk_bounds(conds)
+    if range_conds:
+        fraction = range_selectivity(stats, pk_col, low, high)
+        rest = [c for c in conds if not any(c is r for r in range_conds)]
+        candidates.append(({"type": "RANGE", "low": low, "high": high, "reverse": False},
+                           rest, depth + fraction * (pages + rows)))
+
+    candidates.append(({"type": "SCAN", "reverse": False}, conds, pages + rows))
+
+    access, filters, cost = min(candidates, key=lambda candidate: candidate[2])
+    access.update({
+        "table": table["name"],
+        "pk_col": pk_col,
+        "filters": filters,
+        "rows": min(out_rows, 1) if access["type"] == "SEARCH" else out_rows,
+        "cost": cost,
+    })
+    return access
+
+def _conds_selectivity(stats, conds):
+    """
+    Combined selectivity of ANDed conditions, assuming columns are independent.
+    Numeric range conditions on the same column are merged into one range first,
+    so `age > 10 AND age < 20` isn't counted as two unrelated filters.
+    """
+    fraction = 1.0
+    bounds: dict[str, list] = {}
+    for cond in conds:
+        val = cond["val"]
+        if cond["op"] in RANGE_OPS and isinstance(val, (int, float)):
+            low, high = bounds.setdefault(cond["col"], [None, None])
+            if cond["op"] in (">", ">="):
+                bounds[cond["col"]][0] = val if low is None else max(low, val)
+            else:
+                bounds[cond["col"]][1] = val if high is None else min(high, val)
+        else:
+            fraction *= selectivity(stats, cond["col"], cond["op"], val)
+
+    for col, (low, high) in bounds.items():
+        fraction *= range_selectivity(stats, col, low, high)
+    return fraction
+
+def _pk_bounds(conds):
+    """
+    Fold primary key range conditions into inclusive integer bounds.
+    Keys are integers, so `id > 4.5` is exactly `id >= 5`.
+    """
+    low, high, used = None, None, []
+    for cond in conds:
+        val = cond["val"]
+        if cond["col_index"] != 0 or cond["op"] not in RANGE_OPS:
+            continue
+        if not isinstance(val, (int, float)) or isinstance(val, bool):
+            continue
+        if cond["op"] == ">":
+            bound_low, bound_high = math.floor(val) + 1, None
+        elif cond["op"] == ">=":
+            bound_low, bound_high = math.ceil(val), None
+        elif cond["op"] == "<":
+            bound_low, bound_high = None, math.ceil(val) - 1
+        else:
+            bound_low, bound_high = None, math.floor(val)
+
+        if bound_low is not None:
+            low = bound_low if low is None else max(low, bound_low)
+        if bound_high is not None:
+            high = bound_high if high is None else min(high, bound_high)
+        used.append(cond)
+    return low, high, used
+
+def _plan_join(sides, accesses, conds_by_side, join, cost_based):
+    """
+    Choose the join strategy.
+    - Index nested loop is possible when a side is joined on its primary key: stream
+      the other side and probe that side's tree, checking its WHERE conditions after
+      each probe.
+    - Hash join builds on one side and probes with the other.
+    With statistics for both tables the cheapest option wins. Without them the rules
+    are: index nested loop if a side is joined on its primary key and isn't narrowed
+    to one row by WHERE, otherwise hash join building on a one-row side or the JOIN table.
+    """
+    join_cols = [sides[0]["columns"].index(_require_column(sides[0], join["left_col"])),
+                 sides[1]["columns"].index(_require_column(sides[1], join["right_col"]))]
+
+    options = []
+    for inner in (1, 0):
+        outer = 1 - inner
+        if join_cols[inner] != 0:
+            continue
+        if not cost_based and accesses[inner]["type"] == "SEARCH":
+            continue
+        _, _, inner_depth = table_size(sides[inner].get("stats"))
+        outer_access = accesses[outer]
+        options.append(({
+            "strategy": "INDEX_NESTED_LOOP",
+            "outer": outer_access,
+            "outer_col": join_cols[outer],
+            "outer_is_left": outer == 0,
+            "inner": sides[inner]["name"],
+            "inner_col": sides[inner]["columns"][0],
+            "inner_filters": conds_by_side[inner],
+        }, outer_access["cost"] + outer_access["rows"] * (inner_depth + 1)))
+
+    if cost_based:
+        build = 0 if accesses[0]["rows"] < accesses[1]["rows"] else 1
+    else:
+        build = 0 if accesses[0]["type"] == "SEARCH" else 1
+    probe = 1 - build
+    options.append(({
+        "strategy": "HASH",
+        "build": accesses[build],
+        "build_col": join_cols[build],
+        "probe": accesses[probe],
+        "probe_col": join_cols[probe],
+        "probe_is_left": probe == 0,
+        "on": f"{sides[0]['name']}.{join['left_col']} = {sides[1]['name']}.{join['right_col']}",
+    }, accesses[build]["cost"] + accesses[probe]["cost"] + accesses[build]["rows"]))
+
+    if not cost_based:
+        return options[0][0]
+    return min(options, key=lambda option: option[1])[0]
+
+def _require_column(table, col):
+    if col not in table["columns"]:
+        raise ValueError(f"Unknown column {table['name']}.{col}.")
+    return col
+
+def explain(plan, sort_memory_budget=SORT_MEMORY_BUDGET):
+    """
+    Describe a plan as a list of lines, outermost step first.
+    Row estimates are only shown for cost-based plans.
+    """
+    estimates = plan["cost_based"]
+    lines = []
+    join = plan["join"]
+    if plan["header_count"]:
+        lines.append(f"READ ROW COUNT OF {plan['scan']['table']} FROM DATABASE HEADER")
+    elif join is None:
+        lines.append(_explain_access(plan["scan"], estimates))
+    elif join["strategy"] == "INDEX_NESTED_LOOP":
+        lines.append("INDEX NESTED LOOP JOIN")
+        lines.append("  OUTER: " + _explain_access(plan["scan"], estimates))
+        lines.append(f"  INNER: SEARCH {join['inner']} USING PRIMARY KEY ({join['inner_col']}=?)"
+                     + _explain_filters(join["inner_filters"]))
+    else:
+        lines.append(f"HASH JOIN ON {join['on']}")
+        lines.append("  BUILD: " + _explain_access(join["build"], estimates))
+        lines.append("  PROBE: " + _explain_access(plan["scan"], estimates))
+
+    if plan["parallel"] > 1:
+        lines.append(f"SPLIT INTO KEY RANGES FOR UP TO {plan['parallel']} WORKER PROCESSES")
+    if plan["aggregates"]:
+        lines.append("AGGREGATE " + ", ".join(plan["columns"])
+                     + (" OVER COLUMN BATCHES" if plan["vectorized"] else ""))
+
+    sort = plan["sort"]
+    if sort and plan["limit"] is not None:
+        lines.append(f"SORT BY {sort['col']}{' DESC' if sort['desc'] else ''} USING TOP-N HEAP")
+    elif sort:
+        lines.append(f"SORT BY {sort['col']}{' DESC' if sort['desc'] else ''} "
+                     f"IN MEMORY, EXTERNAL MERGE PAST {sort_memory_budget} BYTES")
+    if plan["limit"] is not None:
+        lines.append(f"LIMIT {plan['limit']}")
+    return lines
+
+def _explain_access(access, estimates):
+    if access["type"] == "SEARCH":
+        line = f"SEARCH {access['table']} USING PRIMARY KEY (={access['key']!r})"
+    elif access["type"] == "RANGE":
+        low = "" if access["low"] is None else f"{access['low']} <= "
+        high = "" if access["high"] is None else f" <= {access['high']}"
+        line = f"SEARCH {access['table']} USING PRIMARY KEY RANGE ({low}{access['pk_col']}{high})"
+    else:
+        line = f"SCAN {access['table']}"
+    if access.get("reverse"):
+        line += " IN REVERSE PRIMARY KEY ORDER"
+    line += _explain_filters(access["filters"])
+    if estimates:
+        line += f" (~{round(access['rows'])} rows)"
+    return line
+
+def _explain_filters(filters):
+    if not filters:
+        return ""
+    return " FILTER " + " AND ".join(f"{f['col']} {f['op']} {f['val']!r}" for f in filters)
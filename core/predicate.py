@@ -0,0 +1,33 @@
+"""
+Predicates:
+Evaluates WHERE conditions against rows. A filter is a dict
+{"col_index", "op", "val"} naming a position in the row's values array.
+"""
+from core.sorter import sort_key
+
+def compare(value, op, operand):
+    """
+    SQL-style comparison: anything compared with NULL is false, and ordering
+    across types follows the same total order ORDER BY uses.
+    """
+    if value is None or operand is None:
+        return False
+    if op == "=":
+        return value == operand
+    if op == "!=":
+        return value != operand
+
+    left, right = sort_key(value), sort_key(operand)
+    if op == "<":
+        return left < right
+    if op == "<=":
+        return left <= right
+    if op == ">":
+        return left > right
+    if op == ">=":
+        return left >= right
+    raise ValueError(f"Unknown operator {op}")
+
+def row_matches(row, filters):
+    values = row["values"]
+    return all(compare(values[f["col_index"]], f["op"], f["val"]) for f in filters)
@@ -0,0 +1,74 @@
+"""
+Row Cache:
+A bounded LRU of decoded rows keyed by (table, primary key), sitting in front of
+`BTree.search`. It is budgeted by the rows' approximate encoded size, so a few
+wide rows can't hold as much memory as thousands of narrow ones. A hot primary key lookup served from here touches no page and
+decodes no JSON. The executor keeps it consistent: INSERT and DELETE drop the
+key, UPDATE writes the new row through.
+"""
+from collections import OrderedDict
+
+from core.serializer import estimate_row_size
+
+DEFAULT_ROW_CACHE_BYTES = 4 * 1024 * 1024
+
+class RowCache:
+    def __init__(self, capacity=DEFAULT_ROW_CACHE_BYTES):
+        """
+        `capacity` is the most bytes of rows kept, as `estimate_row_size` counts
+        them; 0 turns the cache off.
+        """
+        self.capacity = capacity
+        # (table, pk) -> (row values, estimated size)
+        self.rows: OrderedDict[tuple[str, int], tuple[list, int]] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def search(self, table_name, btree, key):
+        """
+        `btree.search(key)` through the cache. Callers get their own copy of the row.
+        """
+        cache_key = (table_name, key)
+        entry = self.rows.get(cache_key)
+        if entry is not None:
+            self.rows.move_to_end(cache_key)
+            self.hits += 1
+            return {"values": list(entry[0])}
+
+        self.misses += 1
+        row = btree.search(key)
+        if row is not None:
+            self.put(table_name, key, row)
+        return row
+
+    def put(self, table_name, key, row):
+        self.invalidate(table_name, key)
+        size = estimate_row_size(row)
+        if size > self.capacity:
+            # Also covers a disabled cache
+            return
+        self.rows[(table_name, key)] = (list(row["values"]), size)
+        self.bytes += size
+        while self.bytes > self.capacity:
+            _, (_, dropped) = self.rows.popitem(last=False)
+            self.bytes -= dropped
+            self.evictions += 1
+
+    def invalidate(self, table_name, key):
+        entry = self.rows.pop((table_name, key), None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "rows": len(self.rows),
+            "bytes": self.bytes,
+            "capacity": self.capacity,
+        }
@@ -0,0 +1,84 @@
+"""
+The Sorter (ORDER BY):
+Sorts rows in memory while they fit in a memory budget. Past the budget it becomes
+an external merge sort: each full buffer is sorted and spilled to a temp file as a
+"run", and the runs are then merged back together with a k-way heap merge.
+ORDER BY ... LIMIT N skips all of that and keeps a bounded heap of N rows.
+"""
+import heapq
+import json
+import struct
+import tempfile
+from core.serializer import estimate_row_size
+
+# Estimated bytes of row data held in memory before a sorted run is spilled to disk
+SORT_MEMORY_BUDGET = 4 * 1024 * 1024
+# Spilled rows are [4 bytes: length][JSON]; a joined row can be bigger than any page
+RUN_RECORD_LENGTH = struct.Struct('>I')
+
+def sort_key(value):
+    """
+    Total order over column values so mixed types never fail to compare:
+    NULL first, then numbers, then strings.
+    """
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    return (2, str(value))
+
+def sort_rows(rows, key, reverse=False, limit=None, memory_budget=SORT_MEMORY_BUDGET):
+    """
+    Return an iterator over `rows` ordered by `key(row)`.
+    """
+    if limit is not None:
+        # Top-N: the heap never holds more than `limit` rows
+        if reverse:
+            return iter(heapq.nlargest(limit, rows, key=key))
+        return iter(heapq.nsmallest(limit, rows, key=key))
+
+    runs = []
+    buffer = []
+    buffer_bytes = 0
+    for row in rows:
+        buffer.append(row)
+        buffer_bytes += estimate_row_size(row)
+        if buffer_bytes > memory_budget:
+            buffer.sort(key=key, reverse=reverse)
+            runs.append(_write_run(buffer))
+            buffer = []
+            buffer_bytes = 0
+
+    buffer.sort(key=key, reverse=reverse)
+    if not runs:
+        # Everything fit in memory, no temp files needed
+        return iter(buffer)
+    return _merge_runs(runs, buffer, key, reverse)
+
+def _write_run(rows):
+    """
+    Spill a sorted run to an anonymous temp file as length-prefixed JSON records.
+    """
+    run_file = tempfile.TemporaryFile()
+    for row in rows:
+        payload = json.dumps(row, separators=(',', ':')).encode('utf-8')
+        run_file.write(RUN_RECORD_LENGTH.pack(len(payload)) + payload)
+    run_file.seek(0)
+    return run_file
+
+def _read_run(run_file):
+    while True:
+        length_prefix = run_file.read(RUN_RECORD_LENGTH.size)
+        if len(length_prefix) < RUN_RECORD_LENGTH.size:
+            return
+        payload_len = RUN_RECORD_LENGTH.unpack(length_prefix)[0]
+        yield json.loads(run_file.read(payload_len))
+
+def _merge_runs(runs, in_memory_run, key, reverse):
+    try:
+        readers = [_read_run(run_file) for run_file in runs]
+        yield from heapq.merge(*readers, in_memory_run, key=key, reverse=reverse)
+    finally:
+        # Temp files delete themselves once closed
+        for run_file in runs:
+            run_file.close()
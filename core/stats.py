@@ -0,0 +1,186 @@
+"""
+Table Statistics (ANALYZE):
+Counts a table's rows, pages and tree depth from page headers alone, then decodes
+a sample of its leaves to estimate each column's number of distinct values
+(HyperLogLog) and value distribution (equi-depth histogram).
+The planner turns these into selectivity and cost estimates.
+"""
+import hashlib
+import math
+
+HLL_PRECISION = 10  # 2^10 registers, about 3% standard error
+HISTOGRAM_BUCKETS = 8
+ANALYZE_SAMPLE_PAGES = 64  # leaves decoded per table for the column statistics
+
+# Guesses used when a table has never been analyzed or a column has no histogram
+DEFAULT_ROW_COUNT = 1000
+DEFAULT_ROWS_PER_PAGE = 50
+DEFAULT_EQ_SELECTIVITY = 0.1
+DEFAULT_RANGE_SELECTIVITY = 1 / 3
+
+class HyperLogLog:
+    """
+    Estimates how many distinct values were added using a few bytes of registers.
+    """
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.registers = bytearray(self.num_registers)
+
+    def add(self, value):
+        digest = hashlib.blake2b(repr(value).encode('utf-8'), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+
+        # The top bits pick a register, the rest are searched for their leading zeros
+        register = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        rest = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - rest.bit_length() + 1
+        if rank > self.registers[register]:
+            self.registers[register] = rank
+
+    def estimate(self):
+        m = self.num_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+
+        # Small cardinalities: linear counting over the empty registers is more accurate
+        empty = self.registers.count(0)
+        if raw <= 2.5 * m and empty:
+            return m * math.log(m / empty)
+        return raw
+
+def analyze_table(btree, columns, sample_pages=ANALYZE_SAMPLE_PAGES):
+    """
+    Collect the statistics dict stored in a table's catalog row.
+    """
+    row_count = 0
+    page_count = 0
+    leaves = []
+    for page_num, is_leaf, num_cells in btree.walk_pages():
+        page_count += 1
+        if is_leaf:
+            leaves.append(page_num)
+            row_count += num_cells
+
+    # Evenly spaced leaves give a sample spread over the whole key range
+    if len(leaves) > sample_pages:
+        step = len(leaves) / sample_pages
+        leaves = [leaves[int(i * step)] for i in range(sample_pages)]
+
+    sketches = [HyperLogLog() for _ in columns]
+    nulls = [0 for _ in columns]
+    samples: list[list] = [[] for _ in columns]
+    sampled_rows = 0
+    for leaf_page_num in leaves:
+        for row in btree.traverse(leaf_page_num):
+            sampled_rows += 1
+            for i, value in enumerate(row["values"]):
+                if value is None:
+                    nulls[i] += 1
+                else:
+                    sketches[i].add(value)
+                    samples[i].append(value)
+
+    scale = row_count / sampled_rows if sampled_rows else 0
+    column_stats = {}
+    for i, col in enumerate(columns):
+        distinct = sketches[i].estimate()
+        # A column that looks unique in the sample is assumed unique in the table;
+        # otherwise the sample most likely already saw every value.
+        if distinct >= 0.9 * len(samples[i]):
+            distinct *= scale
+        column_stats[col] = {
+            "distinct": max(1, min(row_count, round(distinct))),
+            "nulls": round(nulls[i] * scale),
+            "histogram": _build_histogram(samples[i]),
+        }
+
+    return {
+        "row_count": row_count,
+        "page_count": page_count,
+        "depth": btree.depth(),
+        "sampled_rows": sampled_rows,
+        "columns": column_stats,
+    }
+
+def compact_stats(stats):
+    """
+    Yield `stats`, then ever smaller versions of it for catalog rows that would
+    outgrow a page: histograms with half as many buckets each time, then no
+    histograms, then no per-column statistics at all.
+    """
+    yield stats
+    step = 2
+    while step <= HISTOGRAM_BUCKETS:
+        yield _map_histograms(stats, lambda histogram: histogram[::step])
+        step *= 2
+    yield _map_histograms(stats, lambda histogram: None)
+    yield dict(stats, columns={})
+
+def _map_histograms(stats, shrink):
+    columns = {col: dict(col_stats, histogram=col_stats["histogram"] and shrink(col_stats["histogram"]))
+               for col, col_stats in stats["columns"].items()}
+    return dict(stats, columns=columns)
+
+def _build_histogram(values):
+    """
+    Equi-depth histogram: HISTOGRAM_BUCKETS + 1 boundaries with the same number of
+    sampled values between each pair. Only built for numeric columns.
+    """
+    if not values or not all(isinstance(v, (int, float)) for v in values):
+        return None
+    values = sorted(values)
+    last = len(values) - 1
+    return [values[round(i * last / HISTOGRAM_BUCKETS)] for i in range(HISTOGRAM_BUCKETS + 1)]
+
+def _fraction_below(histogram, value):
+    """
+    Estimated fraction of values < `value`, interpolating inside a bucket.
+    """
+    if value <= histogram[0]:
+        return 0.0
+    if value > histogram[-1]:
+        return 1.0
+    buckets = len(histogram) - 1
+    for i in range(buckets):
+        lo, hi = histogram[i], histogram[i + 1]
+        if value <= hi:
+            within = (value - lo) / (hi - lo) if hi > lo else 0.0
+            return (i + within) / buckets
+    return 1.0
+
+def selectivity(table_stats, col, op, value):
+    """
+    Estimated fraction of a table's rows where `col op value` holds.
+    """
+    col_stats = (table_stats or {}).get("columns", {}).get(col)
+    if op in ("=", "!="):
+        eq = 1 / col_stats["distinct"] if col_stats else DEFAULT_EQ_SELECTIVITY
+        return eq if op == "=" else 1 - eq
+
+    histogram = col_stats and col_stats["histogram"]
+    if not histogram or not isinstance(value, (int, float)):
+        return DEFAULT_RANGE_SELECTIVITY
+    below = _fraction_below(histogram, value)
+    return below if op in ("<", "<=") else 1 - below
+
+def range_selectivity(table_stats, col, low, high):
+    """
+    Estimated fraction of rows with low <= col <= high (either bound may be None).
+    """
+    below_high = 1.0 if high is None else 1 - selectivity(table_stats, col, ">", high)
+    below_low = 0.0 if low is None else selectivity(table_stats, col, "<", low)
+    fraction = below_high - below_low
+    if fraction <= 0:
+        # Histograms are coarse; never claim a range is certainly empty
+        return 1 / max(1, (table_stats or {}).get("row_count", DEFAULT_ROW_COUNT))
+    return fraction
+
+def table_size(table_stats):
+    """
+    (rows, pages, depth) from statistics, or defaults for a table never analyzed.
+    """
+    if not table_stats:
+        return DEFAULT_ROW_COUNT, DEFAULT_ROW_COUNT // DEFAULT_ROWS_PER_PAGE, 2
+    return table_stats["row_count"], max(1, table_stats["page_count"]), table_stats["depth"]
@@ -0,0 +1,144 @@
+"""
+Vectorized Batch Scan:
+Reads a table a few thousand rows at a time and turns each batch into columns.
+Columns holding only numbers become NumPy arrays, so WHERE filters and aggregates
+run as array expressions over the whole batch instead of one row at a time.
+Every other column (text, NULLs, mixed types) stays an object array and is
+evaluated element by element with the usual predicate rules.
+NumPy is optional; without it `available()` is False and callers stay row-at-a-time.
+"""
+from core.predicate import compare
+from core.sorter import sort_key
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - batch scans just aren't offered
+    np = None
+
+BATCH_SIZE = 4096
+
+_NUMPY_OPS = {
+    "=": lambda column, operand: column == operand,
+    "!=": lambda column, operand: column != operand,
+    "<": lambda column, operand: column < operand,
+    "<=": lambda column, operand: column <= operand,
+    ">": lambda column, operand: column > operand,
+    ">=": lambda column, operand: column >= operand,
+}
+
+def available():
+    return np is not None
+
+def to_columns(rows, num_columns):
+    """
+    Transpose a batch of row dicts into one array per column.
+    """
+    columns = []
+    value_lists = list(zip(*(row["values"] for row in rows))) if rows else [()] * num_columns
+    for values in value_lists:
+        columns.append(_to_array(values))
+    return columns
+
+def _to_array(values):
+    # bool is an int subclass, but True/1 must stay distinct from numbers here
+    if all(type(value) is int for value in values):
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            pass
+    elif all(type(value) in (int, float) for value in values):
+        return np.array(values, dtype=np.float64)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+def scan_batches(btree, num_columns, access=None, batch_size=BATCH_SIZE, page_nums=None):
+    """
+    Yield (columns, mask) for each batch of a SCAN/RANGE access: the batch's column
+    arrays and a boolean array marking the rows that pass the access's filters.
+    `page_nums` limits the scan to those subtrees (used by parallel scan workers).
+    """
+    access = access or {}
+    low, high = access.get("low"), access.get("high")
+    reverse = access.get("reverse", False)
+    filters = access.get("filters", ())
+    for page_num in (page_nums if page_nums is not None else [None]):
+        for rows in btree.traverse_batches(batch_size, page_num, reverse, low, high):
+            columns = to_columns(rows, num_columns)
+            yield columns, filter_mask(columns, filters, len(rows))
+
+def filter_mask(columns, filters, num_rows):
+    """
+    Evaluate a list of {"col_index", "op", "val"} filters over a batch.
+    """
+    mask = np.ones(num_rows, dtype=bool)
+    for f in filters:
+        mask &= _compare_column(columns[f["col_index"]], f["op"], f["val"])
+    return mask
+
+def _compare_column(column, op, operand):
+    if column.dtype == object or isinstance(operand, bool):
+        return np.fromiter((compare(value, op, operand) for value in column), dtype=bool, count=len(column))
+    if operand is None:
+        return np.zeros(len(column), dtype=bool)
+    if isinstance(operand, (int, float)):
+        return _NUMPY_OPS[op](column, operand)
+
+    # A numeric column against text: every number sorts before every string
+    result = op in ("!=", "<", "<=")
+    return np.full(len(column), result, dtype=bool)
+
+def accumulate_batch(states, aggregates, columns, mask):
+    """
+    Fold the rows of a batch selected by `mask` into aggregate partial states,
+    in the same [count, sum, min, max] shape `core.aggregate` uses.
+    """
+    for state, agg in zip(states, aggregates):
+        if agg["col_index"] is None:
+            state[0] += int(np.count_nonzero(mask))
+            continue
+
+        column = columns[agg["col_index"]][mask]
+        if column.dtype == object:
+            _accumulate_objects(state, agg["func"], column)
+            continue
+        if len(column) == 0:
+            continue
+
+        func = agg["func"]
+        if func in ("COUNT", "SUM", "AVG"):
+            state[0] += len(column)
+            if func != "COUNT":
+                state[1] += _column_sum(column)
+        elif func == "MIN":
+            value = column.min().item()
+            if state[2] is None or sort_key(value) < sort_key(state[2]):
+                state[2] = value
+        elif func == "MAX":
+            value = column.max().item()
+            if state[3] is None or sort_key(value) > sort_key(state[3]):
+                state[3] = value
+
+def _column_sum(column):
+    # int64 sums wrap silently, so fall back to Python ints when they could overflow
+    if column.dtype == np.int64 and int(np.abs(column).max()) > (2 ** 63 - 1) // len(column):
+        return sum(column.tolist())
+    return column.sum().item()
+
+def _accumulate_objects(state, func, column):
+    # Mixed columns: same rules as the row-at-a-time path, NULLs are skipped
+    values = [value for value in column if value is not None]
+    if func == "COUNT":
+        state[0] += len(values)
+    elif func in ("SUM", "AVG"):
+        numbers = [value for value in values if isinstance(value, (int, float))]
+        state[0] += len(numbers)
+        state[1] += sum(numbers)
+    elif func == "MIN" and values:
+        value = min(values, key=sort_key)
+        if state[2] is None or sort_key(value) < sort_key(state[2]):
+            state[2] = value
+    elif func == "MAX" and values:
+        value = max(values, key=sort_key)
+        if state[3] is None or sort_key(value) > sort_key(state[3]):
+            state[3] = value
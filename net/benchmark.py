@@ -0,0 +1,126 @@
+"""
+Benchmark: the binary protocol against the Flask /query endpoint on localhost.
+Both serve the same Executor and the same database. The workload is a run of
+primary key lookups followed by a few full-table reads.
+
+Run it with: python -m net.benchmark [--rows 2000] [--lookups 2000]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.request
+from core.executor import Executor
+from net.client import ConnectionPool
+from net.server import Server
+from sql.parser import parse_statement
+
+def build_database(db_file, num_rows):
+    executor = Executor(db_file)
+    executor.execute(parse_statement("CREATE TABLE users (id, name, city, age)"))
+    for i in range(1, num_rows + 1):
+        executor.execute(parse_statement(f"INSERT INTO users VALUES ({i}, 'user_{i}', 'city_{i % 40}', {20 + i % 50})"))
+    return executor
+
+def bench_flask(executor, keys, scans):
+    """
+    One HTTP request per statement, as the web UI sends them.
+    """
+    from werkzeug.serving import make_server
+    import core.executor
+
+    # The web app opens data/test.db on import; hand it our executor instead
+    original_executor = core.executor.Executor
+    core.executor.Executor = lambda db_file: executor
+    try:
+        from web import app as web_app
+    finally:
+        core.executor.Executor = original_executor
+    # Don't let the per-request access log slow down (and drown out) the measurement
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    http_server = make_server("127.0.0.1", 0, web_app.app, threaded=True)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{http_server.server_port}/query"
+
+    def post(sql):
+        request = urllib.request.Request(url, data=json.dumps({"sql": sql}).encode(),
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+
+    try:
+        started = time.perf_counter()
+        for key in keys:
+            post(f"SELECT * FROM users WHERE id = {key}")
+        lookups = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(scans):
+            post("SELECT * FROM users")
+        return lookups, time.perf_counter() - started
+    finally:
+        http_server.shutdown()
+
+async def bench_binary(executor, keys, scans, pool_size):
+    """
+    Prepared lookups: one at a time, then pipelined on every pooled connection.
+    """
+    server = Server(executor, port=0)
+    await server.start()
+    pool = ConnectionPool(port=server.port, size=pool_size)
+    sql = "SELECT * FROM users WHERE id = ?"
+    try:
+        started = time.perf_counter()
+        for key in keys:
+            await pool.execute(sql, [key])
+        sequential = time.perf_counter() - started
+
+        async def pipelined(chunk):
+            async with pool.connection() as connection:
+                await connection.execute_many(sql, [[key] for key in chunk])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(pipelined(keys[i::pool_size]) for i in range(pool_size)))
+        pipeline = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(scans):
+            await pool.query("SELECT * FROM users")
+        return sequential, pipeline, time.perf_counter() - started
+    finally:
+        await pool.close()
+        await server.close()
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rows", type=int, default=2000)
+    arg_parser.add_argument("--lookups", type=int, default=2000)
+    arg_parser.add_argument("--scans", type=int, default=20)
+    arg_parser.add_argument("--pool-size", type=int, default=4)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        executor = build_database(os.path.join(tmp_dir, "bench.db"), args.rows)
+        keys = [random.randint(1, args.rows) for _ in range(args.lookups)]
+        try:
+            binary = asyncio.run(bench_binary(executor, keys, args.scans, args.pool_size))
+            flask_lookups, flask_scans = bench_flask(executor, keys, args.scans)
+        finally:
+            executor.close()
+
+    print(f"{args.lookups} primary key lookups:")
+    print(f"  flask /query          {args.lookups / flask_lookups:10.0f} req/s")
+    print(f"  binary, sequential    {args.lookups / binary[0]:10.0f} req/s")
+    print(f"  binary, pipelined x{args.pool_size}  {args.lookups / binary[1]:10.0f} req/s")
+    print(f"{args.scans} full scans of {args.rows} rows:")
+    print(f"  flask /query          {flask_scans / args.scans * 1000:10.1f} ms each")
+    print(f"  binary                {binary[2] / args.scans * 1000:10.1f} ms each")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+The Network Client:
+asyncio client for `net.server`. A `Connection` tags every request with an id and
+matches answers to waiting callers, so any number of requests can be in flight on
+one socket at once (pipelining); `execute_many` sends a whole batch before reading
+a single answer. `ConnectionPool` shares a few connections between tasks.
+
+SELECTs return executor-style rows ({"values": [...]}), other statements return
+their message, and errors raise `QueryError`.
+"""
+import asyncio
+import contextlib
+import itertools
+from net import protocol
+
+class QueryError(Exception):
+    pass
+
+class PreparedStatement:
+    def __init__(self, connection, statement_id, param_count, sql):
+        self.connection = connection
+        self.statement_id = statement_id
+        self.param_count = param_count
+        self.sql = sql
+
+class Connection:
+    def __init__(self, reader, writer, fetch_size=protocol.DEFAULT_FETCH_SIZE):
+        self.reader = reader
+        self.writer = writer
+        self.fetch_size = fetch_size
+        self._request_ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        # SQL text -> statement prepared on this connection
+        self._prepared: dict[str, PreparedStatement] = {}
+        self._reader_task = asyncio.get_running_loop().create_task(self._read_responses())
+
+    @classmethod
+    async def open(cls, host="127.0.0.1", port=protocol.DEFAULT_PORT, fetch_size=protocol.DEFAULT_FETCH_SIZE):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, fetch_size)
+
+    async def _read_responses(self):
+        error = ConnectionError("Connection closed by the server.")
+        try:
+            while True:
+                frame = await protocol.read_frame(self.reader)
+                if frame is None:
+                    break
+                msg_type, request_id, body = frame
+                future = self._pending.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_result((msg_type, body))
+        except (ConnectionError, asyncio.IncompleteReadError, protocol.ProtocolError) as e:
+            error = e
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    @property
+    def closed(self):
+        return self._reader_task.done()
+
+    def _send(self, msg_type, body):
+        """
+        Write a request frame and return the future its answer will resolve.
+        """
+        if self.closed:
+            raise ConnectionError("Connection is closed.")
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.writer.write(protocol.encode_frame(msg_type, request_id, body))
+        return future
+
+    async def _request(self, msg_type, body):
+        future = self._send(msg_type, body)
+        await self.writer.drain()
+        return await future
+
+    async def prepare(self, sql):
+        statement = self._prepared.get(sql)
+        if statement is None:
+            msg_type, body = await self._request(protocol.PREPARE, protocol.encode_text(sql))
+            _check(msg_type, body)
+            statement_id, param_count = protocol.decode_prepared(body)
+            statement = PreparedStatement(self, statement_id, param_count, sql)
+            self._prepared[sql] = statement
+        return statement
+
+    async def execute(self, statement, params=()):
+        """
+        Run a prepared statement (or SQL text, prepared once per connection) with `params`.
+        """
+        if isinstance(statement, str):
+            statement = await self.prepare(statement)
+        msg_type, body = await self._request(protocol.EXECUTE, self._execute_body(statement, params))
+        return await self._result(msg_type, body)
+
+    async def execute_many(self, statement, param_lists):
+        """
+        Pipeline one EXECUTE per parameter list: every request is written before
+        any answer is awaited. Results come back in the same order.
+        """
+        if isinstance(statement, str):
+            statement = await self.prepare(statement)
+        futures = [self._send(protocol.EXECUTE, self._execute_body(statement, params)) for params in param_lists]
+        await self.writer.drain()
+        results = []
+        for future in futures:
+            msg_type, body = await future
+            results.append(await self._result(msg_type, body))
+        return results
+
+    async def query(self, sql):
+        """
+        Run SQL text once, without keeping a prepared statement around.
+        """
+        body = protocol.encode_id(self.fetch_size) + protocol.encode_text(sql)
+        msg_type, body = await self._request(protocol.QUERY, body)
+        return await self._result(msg_type, body)
+
+    async def close_statement(self, statement):
+        self._prepared.pop(statement.sql, None)
+        _check(*await self._request(protocol.CLOSE_STATEMENT, protocol.encode_id(statement.statement_id)))
+
+    def _execute_body(self, statement, params):
+        if statement.connection is not self:
+            raise QueryError("Statement was prepared on a different connection.")
+        return protocol.encode_values(list(params), bytearray(protocol.encode_ids(statement.statement_id, self.fetch_size)))
+
+    async def _result(self, msg_type, body):
+        _check(msg_type, body)
+        if msg_type == protocol.MESSAGE:
+            return protocol.decode_text(body)[0]
+
+        # Keep pulling batches until the server says the cursor is drained
+        cursor_id, done, rows = protocol.decode_rows(body)
+        while not done:
+            msg_type, body = await self._request(protocol.FETCH, protocol.encode_ids(cursor_id, self.fetch_size))
+            _check(msg_type, body)
+            cursor_id, done, batch = protocol.decode_rows(body)
+            rows.extend(batch)
+        return rows
+
+    async def close(self):
+        self.writer.close()
+        with contextlib.suppress(ConnectionError):
+            await self.writer.wait_closed()
+        await self._reader_task
+
+def _check(msg_type, body):
+    if msg_type == protocol.ERROR:
+        raise QueryError(protocol.decode_text(body)[0])
+
+class ConnectionPool:
+    """
+    Up to `size` connections, opened on demand and handed out one task at a time.
+    """
+    def __init__(self, host="127.0.0.1", port=protocol.DEFAULT_PORT, size=4, fetch_size=protocol.DEFAULT_FETCH_SIZE):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.fetch_size = fetch_size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._connections: list[Connection] = []
+        # Connections open or being opened, counted before the connect so racing tasks can't overshoot
+        self._opened = 0
+
+    async def acquire(self):
+        if self._idle.empty() and self._opened < self.size:
+            self._opened += 1
+            try:
+                connection = await Connection.open(self.host, self.port, self.fetch_size)
+            except OSError:
+                self._opened -= 1
+                raise
+            self._connections.append(connection)
+            return connection
+        return await self._idle.get()
+
+    def release(self, connection):
+        if connection.closed:
+            # The server went away; a fresh connection is opened on the next acquire
+            self._connections.remove(connection)
+            self._opened -= 1
+            return
+        self._idle.put_nowait(connection)
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        connection = await self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    async def execute(self, sql, params=()):
+        async with self.connection() as connection:
+            return await connection.execute(sql, params)
+
+    async def query(self, sql):
+        async with self.connection() as connection:
+            return await connection.query(sql)
+
+    async def close(self):
+        for connection in self._connections:
+            await connection.close()
+        self._connections.clear()
+        self._opened = 0
@@ -0,0 +1,179 @@
+"""
+Wire Protocol:
+Every message is a frame: [4 bytes: body length][1 byte: message type][4 bytes: request id]
+followed by the body. The client picks request ids and the server answers each
+request with one frame carrying the same id, in the order the requests arrived,
+so a client may pipeline several requests before reading any answers.
+
+Bodies are built from a few primitives:
+- text: [4 bytes: length] [UTF-8 bytes]
+- value: [1 byte: tag] [payload], see the TAG_* constants
+- values: [2 bytes: count] [value ...]
+- rows: [4 bytes: count] [values ...]
+"""
+import struct
+
+DEFAULT_PORT = 5433
+DEFAULT_FETCH_SIZE = 500
+
+FRAME_HEADER = struct.Struct('>IBI')
+# Anything bigger is a broken or hostile peer, not a real request
+MAX_FRAME_BODY = 64 * 1024 * 1024
+
+# Requests
+PREPARE = 1         # text sql -> PREPARED
+EXECUTE = 2         # [4: statement id][4: fetch size] values params -> ROWS / MESSAGE
+QUERY = 3           # [4: fetch size] text sql -> ROWS / MESSAGE, prepare and execute in one step
+FETCH = 4           # [4: cursor id][4: fetch size] -> ROWS
+CLOSE_STATEMENT = 5 # [4: statement id] -> OK
+CLOSE_CURSOR = 6    # [4: cursor id] -> OK
+
+# Responses
+OK = 64             # empty
+ERROR = 65          # text message
+MESSAGE = 66        # text, the result of a statement that returns no rows
+PREPARED = 67       # [4: statement id][2: parameter count]
+ROWS = 68           # [4: cursor id][1: done] rows, cursor id is 0 once done
+
+TAG_NULL = 0
+TAG_INT = 1         # 8-byte signed
+TAG_BIGINT = 2      # text, for ints that don't fit in 8 bytes
+TAG_FLOAT = 3       # 8-byte double
+TAG_TEXT = 4
+TAG_TRUE = 5
+TAG_FALSE = 6
+
+_U16 = struct.Struct('>H')
+_U32 = struct.Struct('>I')
+_I64 = struct.Struct('>q')
+_F64 = struct.Struct('>d')
+_TWO_U32 = struct.Struct('>II')
+
+class ProtocolError(Exception):
+    pass
+
+def encode_frame(msg_type, request_id, body=b""):
+    return FRAME_HEADER.pack(len(body), msg_type, request_id) + body
+
+async def read_frame(reader):
+    """
+    Read one frame from an asyncio StreamReader.
+    Returns (msg_type, request_id, body), or None if the peer closed the connection.
+    """
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except EOFError:
+        return None
+    length, msg_type, request_id = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_BODY:
+        raise ProtocolError(f"Frame of {length} bytes is too large.")
+    body = await reader.readexactly(length)
+    return msg_type, request_id, body
+
+def encode_text(text):
+    data = text.encode('utf-8')
+    return _U32.pack(len(data)) + data
+
+def decode_text(body, offset=0):
+    (length,) = _U32.unpack_from(body, offset)
+    offset += 4
+    return bytes(body[offset:offset + length]).decode('utf-8'), offset + length
+
+def encode_values(values, out=None):
+    """
+    Append the encoding of a list of values to bytearray `out` (or a new one).
+    """
+    if out is None:
+        out = bytearray()
+    out += _U16.pack(len(values))
+    for value in values:
+        # bool first: it's an int subclass
+        if value is None:
+            out.append(TAG_NULL)
+        elif value is True:
+            out.append(TAG_TRUE)
+        elif value is False:
+            out.append(TAG_FALSE)
+        elif isinstance(value, int):
+            if -2 ** 63 <= value < 2 ** 63:
+                out.append(TAG_INT)
+                out += _I64.pack(value)
+            else:
+                out.append(TAG_BIGINT)
+                out += encode_text(str(value))
+        elif isinstance(value, float):
+            out.append(TAG_FLOAT)
+            out += _F64.pack(value)
+        elif isinstance(value, str):
+            out.append(TAG_TEXT)
+            out += encode_text(value)
+        else:
+            raise ProtocolError(f"Can't encode value of type {type(value).__name__}.")
+    return out
+
+def decode_values(body, offset=0):
+    (count,) = _U16.unpack_from(body, offset)
+    offset += 2
+    values = []
+    for _ in range(count):
+        tag = body[offset]
+        offset += 1
+        if tag == TAG_NULL:
+            values.append(None)
+        elif tag == TAG_INT:
+            values.append(_I64.unpack_from(body, offset)[0])
+            offset += 8
+        elif tag == TAG_FLOAT:
+            values.append(_F64.unpack_from(body, offset)[0])
+            offset += 8
+        elif tag in (TAG_TEXT, TAG_BIGINT):
+            text, offset = decode_text(body, offset)
+            values.append(int(text) if tag == TAG_BIGINT else text)
+        elif tag in (TAG_TRUE, TAG_FALSE):
+            values.append(tag == TAG_TRUE)
+        else:
+            raise ProtocolError(f"Unknown value tag {tag}.")
+    return values, offset
+
+def encode_rows(cursor_id, done, rows):
+    """
+    Body of a ROWS response; `rows` are executor rows ({"values": [...]}).
+    """
+    out = bytearray(_U32.pack(cursor_id))
+    out.append(1 if done else 0)
+    out += _U32.pack(len(rows))
+    for row in rows:
+        encode_values(row["values"], out)
+    return bytes(out)
+
+def decode_rows(body):
+    """
+    Returns (cursor_id, done, rows) from a ROWS response body.
+    """
+    (cursor_id,) = _U32.unpack_from(body, 0)
+    done = body[4] == 1
+    (count,) = _U32.unpack_from(body, 5)
+    offset = 9
+    rows = []
+    for _ in range(count):
+        values, offset = decode_values(body, offset)
+        rows.append({"values": values})
+    return cursor_id, done, rows
+
+def encode_ids(first, second):
+    return _TWO_U32.pack(first, second)
+
+def decode_ids(body, offset=0):
+    return _TWO_U32.unpack_from(body, offset)
+
+def encode_id(value):
+    return _U32.pack(value)
+
+def decode_id(body, offset=0):
+    return _U32.unpack_from(body, offset)[0]
+
+def encode_prepared(statement_id, param_count):
+    return _U32.pack(statement_id) + _U16.pack(param_count)
+
+def decode_prepared(body):
+    return _U32.unpack_from(body, 0)[0], _U16.unpack_from(body, 4)[0]
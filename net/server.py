@@ -0,0 +1,168 @@
+"""
+The Network Server:
+An asyncio TCP server speaking the framed binary protocol from `net.protocol`,
+backed by a single `Executor`. The event loop only moves bytes; parsing and
+execution, which block on page I/O, run on a one-thread executor pool so the
+engine (which isn't thread-safe) sees one statement at a time while any number
+of connections wait on the socket side.
+
+Each connection has its own prepared statements and open cursors. A SELECT's
+first batch of rows is sent with the EXECUTE/QUERY answer; the rest is pulled
+with FETCH.
+
+Run it with: python -m net.server data/test.db [--host 127.0.0.1] [--port 5433]
+"""
+import argparse
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from core.executor import Executor
+from net import protocol
+from sql.parser import bind_params, count_params, parse_statement
+
+class Session:
+    """
+    Per-connection state: prepared statements and open cursors, by id.
+    """
+    def __init__(self):
+        self.statements: dict[int, dict] = {}
+        # cursor id -> [result rows, position of the next row to send]
+        self.cursors: dict[int, list] = {}
+        self._ids = itertools.count(1)
+
+    def next_id(self):
+        return next(self._ids)
+
+class Server:
+    def __init__(self, executor, host="127.0.0.1", port=protocol.DEFAULT_PORT):
+        self.executor = executor
+        self.host = host
+        self.port = port
+        self._engine_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="engine")
+        self._server = None
+
+    async def start(self):
+        """
+        Start listening. With port 0 the OS picks a free port, stored back in `self.port`.
+        """
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._engine_pool.shutdown()
+
+    async def _handle_connection(self, reader, writer):
+        session = Session()
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                frame = await protocol.read_frame(reader)
+                if frame is None:
+                    break
+                msg_type, request_id, body = frame
+                # Requests on one connection are answered strictly in order, which is what
+                # lets clients pipeline them
+                resp_type, resp_body = await loop.run_in_executor(
+                    self._engine_pool, self._dispatch, session, msg_type, body)
+                writer.write(protocol.encode_frame(resp_type, request_id, resp_body))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, protocol.ProtocolError):
+            pass
+        finally:
+            writer.close()
+
+    def _dispatch(self, session, msg_type, body):
+        """
+        Handle one request on the engine thread. Returns (response type, body).
+        """
+        try:
+            if msg_type == protocol.PREPARE:
+                sql, _ = protocol.decode_text(body)
+                parsed_stmt = parse_statement(sql)
+                statement_id = session.next_id()
+                session.statements[statement_id] = parsed_stmt
+                return protocol.PREPARED, protocol.encode_prepared(statement_id, count_params(parsed_stmt))
+
+            if msg_type == protocol.EXECUTE:
+                statement_id, fetch_size = protocol.decode_ids(body)
+                params, _ = protocol.decode_values(body, 8)
+                parsed_stmt = session.statements.get(statement_id)
+                if parsed_stmt is None:
+                    return protocol.ERROR, protocol.encode_text(f"Unknown statement {statement_id}.")
+                return self._run(session, bind_params(parsed_stmt, params), fetch_size)
+
+            if msg_type == protocol.QUERY:
+                fetch_size = protocol.decode_id(body)
+                sql, _ = protocol.decode_text(body, 4)
+                return self._run(session, parse_statement(sql), fetch_size)
+
+            if msg_type == protocol.FETCH:
+                cursor_id, fetch_size = protocol.decode_ids(body)
+                if cursor_id not in session.cursors:
+                    return protocol.ERROR, protocol.encode_text(f"Unknown cursor {cursor_id}.")
+                return protocol.ROWS, self._next_batch(session, cursor_id, fetch_size)
+
+            if msg_type == protocol.CLOSE_STATEMENT:
+                session.statements.pop(protocol.decode_id(body), None)
+                return protocol.OK, b""
+
+            if msg_type == protocol.CLOSE_CURSOR:
+                session.cursors.pop(protocol.decode_id(body), None)
+                return protocol.OK, b""
+
+            return protocol.ERROR, protocol.encode_text(f"Unknown message type {msg_type}.")
+        except Exception as e:
+            # Parse errors, bad parameters or a failing statement: report it, keep the connection
+            return protocol.ERROR, protocol.encode_text(f"Error: {e}")
+
+    def _run(self, session, parsed_stmt, fetch_size):
+        result = self.executor.execute(parsed_stmt)
+        if isinstance(result, str):
+            if result.startswith("Error:"):
+                return protocol.ERROR, protocol.encode_text(result)
+            return protocol.MESSAGE, protocol.encode_text(result)
+
+        cursor_id = session.next_id()
+        session.cursors[cursor_id] = [result, 0]
+        return protocol.ROWS, self._next_batch(session, cursor_id, fetch_size)
+
+    def _next_batch(self, session, cursor_id, fetch_size):
+        cursor = session.cursors[cursor_id]
+        rows, position = cursor
+        end = position + max(fetch_size, 1)
+        batch = rows[position:end]
+        if end < len(rows):
+            cursor[1] = end
+            return protocol.encode_rows(cursor_id, False, batch)
+        # Drained cursors are closed right away, so clients only close ones they abandon
+        del session.cursors[cursor_id]
+        return protocol.encode_rows(0, True, batch)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Serve a database over the binary protocol.")
+    arg_parser.add_argument("db_file")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=protocol.DEFAULT_PORT)
+    args = arg_parser.parse_args()
+
+    executor = Executor(args.db_file)
+    server = Server(executor, args.host, args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        executor.close()
+
+if __name__ == "__main__":
+    main()
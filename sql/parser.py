@@ -1,10 +1,29 @@
 """
 The SQL Parser:
 Reads a raw SQL string and returns a structured Python dict describing the intent.
-Supports: CREATE TABLE, INSERT INTO, SELECT.
+Supports: CREATE TABLE, INSERT INTO, SELECT (with aggregates / JOIN / WHERE / ORDER BY / LIMIT),
+UPDATE, DELETE, EXPLAIN, ANALYZE.
+A bare `?` in place of a literal is a parameter, filled in later by `bind_params`.
 """
 import re
 
+class Placeholder(str):
+    """
+    Stands in for a `?` parameter until a prepared statement is executed.
+    It is the string "?" to anything that serializes a parsed statement (e.g. as
+    JSON); only identity checks tell it apart from a quoted '?'.
+    """
+    def __new__(cls):
+        return super().__new__(cls, "?")
+
+    def __repr__(self):
+        return "?"
+
+PLACEHOLDER = Placeholder()
+
+INT_LITERAL = re.compile(r"[+-]?\d+")
+FLOAT_LITERAL = re.compile(r"[+-]?(\d+\.\d*|\.\d+|\d+(?=[eE]))([eE][+-]?\d+)?")
+
 def parse_statement(sql: str) -> dict:
     """
     Parses a SQL string into a dictionary.
@@ -14,7 +33,11 @@ def parse_statement(sql: str) -> dict:
     # For now, a simple normalize is fine for our subset.
     sql = re.sub(r'\s+', ' ', sql)
 
-    if sql.upper().startswith("CREATE TABLE"):
+    if sql.upper().startswith("EXPLAIN "):
+        # Format: EXPLAIN SELECT ... -> describe the plan instead of running it
+        return {"type": "EXPLAIN", "stmt": parse_statement(sql[len("EXPLAIN "):])}
+
+    elif sql.upper().startswith("CREATE TABLE"):
         # Format: CREATE TABLE users (id, name, age)
         match = re.match(r"CREATE TABLE\s+(\w+)\s*\((.*?)\)", sql, re.IGNORECASE)
         if match:
@@ -30,43 +53,157 @@ def parse_statement(sql: str) -> dict:
             values_str = str(match.group(2))
             # Basic parsing of values (integers vs strings)
             # Not robust against commas inside strings, but works for the MVP
-            values = []
-            for val in values_str.split(','):
-                val = val.strip()
-                if val.startswith("'") and val.endswith("'"):
-                    values.append(val[1:-1]) # type: ignore
-                elif val.startswith('"') and val.endswith('"'):
-                    values.append(val[1:-1]) # type: ignore
-                elif val.isdigit():
-                    values.append(int(val))
-                else:
-                    values.append(val) # type: ignore
+            values = [parse_value(val) for val in values_str.split(',')]
             return {"type": "INSERT", "table": table_name, "values": values}
 
     elif sql.upper().startswith("SELECT"):
-        # Format: SELECT * FROM users [WHERE id = 1]
-        match = re.match(r"SELECT\s+\*\s+FROM\s+(\w+)(?:\s+WHERE\s+(.*?))?$", sql, re.IGNORECASE)
+        # Format: SELECT * | COUNT(*), SUM(age), ... FROM users
+        #         [JOIN orders ON users.id = orders.user_id]
+        #         [WHERE id = 1] [ORDER BY age [ASC|DESC]] [LIMIT 10]
+        aggregate = r"(?:COUNT|SUM|MIN|MAX|AVG)\s*\([^)]*\)"
+        match = re.match(
+            rf"SELECT\s+(\*|{aggregate}(?:\s*,\s*{aggregate})*)\s+FROM\s+(\w+)"
+            r"(?:\s+(?:INNER\s+)?JOIN\s+(\w+)\s+ON\s+(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+))?"
+            r"(?:\s+WHERE\s+(.*?))?"
+            r"(?:\s+ORDER BY\s+([\w.]+)(?:\s+(ASC|DESC))?)?(?:\s+LIMIT\s+(\d+))?$",
+            sql, re.IGNORECASE)
         if match:
-            table_name = match.group(1)
-            where_str = match.group(2)
+            table_name = match.group(2)
+            where_str = match.group(8)
+
+            join_dict = None
+            if match.group(3):
+                join_table = match.group(3)
+                if join_table == table_name:
+                    raise ValueError(f"Self-joins are not supported: {sql}")
+                on_sides = {match.group(4): match.group(5)}
+                on_sides[match.group(6)] = match.group(7)
+                # ON can name the two tables in either order
+                if set(on_sides) != {table_name, join_table}:
+                    raise ValueError(f"JOIN condition must compare {table_name} and {join_table}: {sql}")
+                join_dict = {"table": join_table, "left_col": on_sides[table_name], "right_col": on_sides[join_table]}
             
-            where_dict = None
-            if where_str:
-                # Expecting simple: column = value
-                where_match = re.match(r"(\w+)\s*=\s*(.*)", where_str)
-                if where_match:
-                    col = str(where_match.group(1))
-                    val_str = str(where_match.group(2)).strip()
-                    
-                    if val_str.isdigit():
-                        val = int(val_str) # type: ignore
-                    elif (val_str.startswith("'") and val_str.endswith("'")) or (val_str.startswith('"') and val_str.endswith('"')):
-                        val = val_str[1:-1] # type: ignore
-                    else:
-                        val = val_str # type: ignore
-                        
-                    where_dict = {"col": col, "op": "=", "val": val}
+            where_dict = parse_where(where_str) if where_str else None
             
-            return {"type": "SELECT", "table": table_name, "where": where_dict}
+            order_by = None
+            if match.group(9):
+                direction = (match.group(10) or "ASC").upper()
+                order_by = {"col": match.group(9), "desc": direction == "DESC"}
+
+            limit = int(match.group(11)) if match.group(11) else None
+
+            aggregates = None if match.group(1) == "*" else parse_aggregates(match.group(1))
+
+            return {"type": "SELECT", "table": table_name, "join": join_dict, "where": where_dict,
+                    "order_by": order_by, "limit": limit, "aggregates": aggregates}
+
+    elif sql.upper().startswith("DELETE FROM"):
+        # Format: DELETE FROM users [WHERE id = 1]
+        match = re.match(r"DELETE FROM\s+(\w+)(?:\s+WHERE\s+(.*))?$", sql, re.IGNORECASE)
+        if match:
+            where_dict = parse_where(match.group(2)) if match.group(2) else None
+            return {"type": "DELETE", "table": match.group(1), "where": where_dict}
+
+    elif sql.upper().startswith("UPDATE"):
+        # Format: UPDATE users SET name = 'bob', age = 30 [WHERE id = 1]
+        match = re.match(r"UPDATE\s+(\w+)\s+SET\s+(.*?)(?:\s+WHERE\s+(.*))?$", sql, re.IGNORECASE)
+        if match:
+            assignments = {}
+            # Not robust against commas inside strings, same as INSERT
+            for assignment in match.group(2).split(','):
+                set_match = re.match(r"\s*(\w+)\s*=\s*(.+)$", assignment)
+                if not set_match:
+                    raise ValueError(f"Unsupported SET clause: {assignment}")
+                assignments[set_match.group(1)] = parse_value(set_match.group(2))
+            where_dict = parse_where(match.group(3)) if match.group(3) else None
+            return {"type": "UPDATE", "table": match.group(1), "set": assignments, "where": where_dict}
+
+    elif sql.upper().startswith("ANALYZE"):
+        # Format: ANALYZE [users]
+        match = re.match(r"ANALYZE(?:\s+(\w+))?$", sql, re.IGNORECASE)
+        if match:
+            return {"type": "ANALYZE", "table": match.group(1)}
 
     raise ValueError(f"Unrecognized or unsupported SQL statement: {sql}")
+
+def parse_value(val_str: str):
+    """
+    Turns a literal into a Python value: quoted strings lose their quotes,
+    signed integers become ints and decimals floats, a bare `?` is a parameter,
+    anything else stays a raw string.
+    """
+    val_str = val_str.strip()
+    if val_str == "?":
+        return PLACEHOLDER
+    if (val_str.startswith("'") and val_str.endswith("'")) or (val_str.startswith('"') and val_str.endswith('"')):
+        return val_str[1:-1]
+    if INT_LITERAL.fullmatch(val_str):
+        return int(val_str)
+    if FLOAT_LITERAL.fullmatch(val_str):
+        return float(val_str)
+    return val_str
+
+def parse_aggregates(select_list: str) -> list:
+    """
+    Parses `COUNT(*), SUM(age), ...` into [{"func": "COUNT", "col": "*"}, ...].
+    """
+    aggregates = []
+    for item in select_list.split(','):
+        match = re.match(r"\s*(COUNT|SUM|MIN|MAX|AVG)\s*\(\s*(\*|[\w.]+)\s*\)\s*$", item, re.IGNORECASE)
+        if not match:
+            raise ValueError(f"Unsupported aggregate: {item.strip()}")
+        func = match.group(1).upper()
+        if match.group(2) == "*" and func != "COUNT":
+            raise ValueError(f"Only COUNT accepts *: {item.strip()}")
+        aggregates.append({"func": func, "col": match.group(2)})
+    return aggregates
+
+def parse_where(where_str: str) -> dict:
+    """
+    Parses `col op value [AND col op value ...]`.
+    One condition gives {"col", "op", "val"}; several give {"op": "AND", "conds": [...]}.
+    """
+    conds = []
+    for cond_str in re.split(r"\s+AND\s+", where_str, flags=re.IGNORECASE):
+        match = re.match(r"([\w.]+)\s*(<=|>=|!=|<>|=|<|>)\s*(.+)$", cond_str.strip())
+        if not match:
+            raise ValueError(f"Unsupported WHERE condition: {cond_str}")
+        op = "!=" if match.group(2) == "<>" else match.group(2)
+        conds.append({"col": match.group(1), "op": op, "val": parse_value(match.group(3))})
+
+    if len(conds) == 1:
+        return conds[0]
+    return {"op": "AND", "conds": conds}
+
+def count_params(parsed_stmt) -> int:
+    """
+    Number of `?` parameters left in a parsed statement.
+    """
+    if parsed_stmt is PLACEHOLDER:
+        return 1
+    if isinstance(parsed_stmt, dict):
+        return sum(count_params(value) for value in parsed_stmt.values())
+    if isinstance(parsed_stmt, list):
+        return sum(count_params(value) for value in parsed_stmt)
+    return 0
+
+def bind_params(parsed_stmt, params) -> dict:
+    """
+    Returns a copy of a parsed statement with its `?` parameters replaced by
+    `params`, in the order they appear in the SQL text.
+    """
+    expected = count_params(parsed_stmt)
+    if len(params) != expected:
+        raise ValueError(f"Statement takes {expected} parameter(s) but {len(params)} were supplied.")
+    remaining = iter(params)
+
+    def fill(node):
+        if node is PLACEHOLDER:
+            return next(remaining)
+        if isinstance(node, dict):
+            return {key: fill(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [fill(value) for value in node]
+        return node
+
+    return fill(parsed_stmt)
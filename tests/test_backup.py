@@ -0,0 +1,126 @@
+"""
+Tests for online and incremental backups.
+"""
+import os
+import sys
+
+# Add the project directory to sys.path so we can import 'core' and 'sql'.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from sql.parser import parse_statement
+from core.backup import BACKUP_MAGIC, BACKUP_HEADER, BackupError, read_backup_header, restore
+from core.executor import Executor
+
+def _remove(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+def test_online_and_incremental_backup():
+    db_file, full, incremental, restored = "test_backup.db", "test_full.bak", "test_incr.bak", "test_restored.db"
+    later = "test_later.bak"
+    _remove(db_file, db_file + "-lsn", full, incremental, later, restored)
+
+    executor = Executor(db_file)
+    executor.execute(parse_statement("CREATE TABLE items (id, label)"))
+    for i in range(1, 801):
+        executor.execute(parse_statement(f"INSERT INTO items VALUES ({i}, 'label_{i:04}')"))
+
+    # Writers keep going between steps; pages they touch after being copied are copied again
+    backup = executor.backup(full)
+    steps = 0
+    while not backup.step(4):
+        steps += 1
+        executor.execute(parse_statement(f"INSERT INTO items VALUES ({1000 + steps}, 'during')"))
+        executor.execute(parse_statement(f"UPDATE items SET label = 'changed' WHERE id = {steps}"))
+    assert steps >= 3 and not os.path.exists(full + ".partial")
+    # Recopied pages overwrite their earlier copy rather than piling up
+    header = read_backup_header(full)
+    assert header["records"] <= header["num_pages"]
+    assert os.path.getsize(full) == len(BACKUP_MAGIC) + BACKUP_HEADER.size + header["records"] * (8 + header["page_size"])
+    snapshot = executor.execute(parse_statement("SELECT * FROM items"))
+
+    # Later changes go into a much smaller incremental backup
+    executor.execute(parse_statement("UPDATE items SET label = 'late' WHERE id = 700"))
+    executor.execute(parse_statement("DELETE FROM items WHERE id = 5"))
+    executor.backup(incremental, base_path=full).run()
+    assert read_backup_header(incremental)["records"] < read_backup_header(full)["records"] // 4
+    expected = executor.execute(parse_statement("SELECT * FROM items"))
+    executor.close()
+
+    restore([full], restored)
+    check = Executor(restored)
+    assert check.execute(parse_statement("SELECT * FROM items")) == snapshot
+    check.close()
+    _remove(restored)
+
+    restore([full, incremental], restored)
+    check = Executor(restored)
+    assert check.execute(parse_statement("SELECT * FROM items")) == expected
+    check.close()
+
+    # Page LSNs are kept next to the database, so the chain carries on after a reopen
+    executor = Executor(db_file)
+    executor.execute(parse_statement("UPDATE items SET label = 'reopened' WHERE id = 10"))
+    executor.backup(later, base_path=incremental).run()
+    header = read_backup_header(later)
+    assert header["base_lsn"] == read_backup_header(incremental)["end_lsn"] > 0
+    assert header["records"] < read_backup_header(full)["records"] // 4
+    expected = executor.execute(parse_statement("SELECT * FROM items"))
+    executor.close()
+    _remove(restored)
+    restore([full, incremental, later], restored)
+    check = Executor(restored)
+    assert check.execute(parse_statement("SELECT * FROM items")) == expected
+    check.close()
+
+    # A pager that never closed may not have saved its LSNs, so "incremental" copies everything
+    executor = Executor(db_file)
+    executor.pager.file.close()
+    executor = Executor(db_file)
+    executor.backup(later, base_path=incremental).run()
+    assert read_backup_header(later)["base_lsn"] == 0
+    executor.close()
+
+    with pytest.raises(BackupError):
+        restore([full], restored)
+    _remove(restored)
+
+    # A flipped byte in a page is caught before anything is written
+    with open(full, "r+b") as f:
+        f.seek(len(BACKUP_MAGIC) + BACKUP_HEADER.size + 8 + 100)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    with pytest.raises(BackupError, match="Checksum"):
+        restore([full], restored)
+    assert not os.path.exists(restored)
+
+    _remove(db_file, db_file + "-lsn", full, incremental, later, restored)
+
+def test_backup_finishes_under_heavy_writes():
+    db_file, full, restored = "test_backup_busy.db", "test_busy.bak", "test_busy_restored.db"
+    _remove(db_file, db_file + "-lsn", full, restored)
+
+    executor = Executor(db_file)
+    executor.execute(parse_statement("CREATE TABLE items (id, label)"))
+    for i in range(1, 301):
+        executor.execute(parse_statement(f"INSERT INTO items VALUES ({i}, 'label_{i:04}')"))
+
+    # Every step rewrites rows all over the table, far more pages than the step copies
+    backup = executor.backup(full)
+    steps = 0
+    while not backup.step(1):
+        steps += 1
+        assert steps <= executor.pager.num_pages
+        executor.execute(parse_statement(f"UPDATE items SET label = 'step_{steps}' WHERE id > {steps}"))
+    snapshot = executor.execute(parse_statement("SELECT * FROM items"))
+    executor.close()
+
+    restore([full], restored)
+    check = Executor(restored)
+    assert check.execute(parse_statement("SELECT * FROM items")) == snapshot
+    check.close()
+    _remove(db_file, db_file + "-lsn", full, restored)
@@ -0,0 +1,83 @@
+"""
+Tests for the per-table Bloom filters.
+"""
+import os
+import sys
+
+# Add the project directory to sys.path so we can import 'core' and 'sql'.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.parser import parse_statement
+from core.bloom import MIN_BLOOM_KEYS, BloomFilter
+from core.executor import Executor
+from core.pager import Pager
+
+def test_bloom_filter_rates():
+    db_file = "test_bloom_pages.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    pager = Pager(db_file)
+    bloom = BloomFilter.create(pager, range(0, 20000, 2), fp_rate=0.02)
+    assert bloom.meta["capacity"] == 20000 and len(bloom.page_nums) > 1
+    # No false negatives, and absent keys pass at roughly the configured rate
+    assert all(bloom.might_contain(key) for key in range(0, 20000, 2))
+    false_positives = sum(bloom.might_contain(key) for key in range(1, 20000, 2))
+    assert false_positives < 10000 * 0.02
+    assert bloom.estimated_fp_rate() < 0.02
+    pager.close()
+
+    # The bits live in the pager's pages and survive a reopen
+    pager = Pager(db_file)
+    reopened = BloomFilter(pager, bloom.meta)
+    assert all(reopened.might_contain(key) for key in range(0, 20000, 2))
+    pager.close()
+    os.remove(db_file)
+
+def test_executor_bloom_filters():
+    db_file = "test_bloom.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    executor = Executor(db_file, bloom_fp_rate=0.01)
+    executor.execute(parse_statement("CREATE TABLE users (id, name)"))
+    for i in range(1, 101):
+        executor.execute(parse_statement(f"INSERT INTO users VALUES ({i * 10}, 'user_{i}')"))
+    bloom = executor.catalog.blooms["users"]
+
+    for key in range(1, 1001):
+        rows = executor.execute(parse_statement(f"SELECT * FROM users WHERE id = {key}"))
+        assert rows == ([{"values": [key, f"user_{key // 10}"]}] if key % 10 == 0 else [])
+    # Almost every absent key was ruled out without reading the table
+    assert bloom.negatives + bloom.false_positives == 900
+    assert bloom.false_positives < 30
+
+    executor.execute(parse_statement("UPDATE users SET id = 5 WHERE id = 10"))
+    assert executor.execute(parse_statement("SELECT * FROM users WHERE id = 5")) == [{"values": [5, "user_1"]}]
+    executor.close()
+
+    # Filters persist, and are kept up to date even without asking for new ones
+    executor = Executor(db_file)
+    assert executor.catalog.blooms["users"].meta["keys"] == 101
+    executor.execute(parse_statement("INSERT INTO users VALUES (7, 'late')"))
+    assert executor.execute(parse_statement("SELECT * FROM users WHERE id = 7")) == [{"values": [7, "late"]}]
+
+    # Outgrowing the planned capacity rebuilds the filter at twice the size
+    btree = executor.catalog.open_tree("users")
+    for key in range(2000, 2000 + MIN_BLOOM_KEYS):
+        btree.insert(key, {"values": [key, "bulk"]})
+        executor.catalog.bloom_add("users", key)
+    assert executor.catalog.blooms["users"].meta["capacity"] == 2 * MIN_BLOOM_KEYS
+    assert executor.execute(parse_statement("SELECT * FROM users WHERE id = 2500")) == [{"values": [2500, "bulk"]}]
+
+    # ANALYZE reports the filter and rebuilds it from the live keys, dropping deleted ones
+    executor.execute(parse_statement("DELETE FROM users WHERE id = 7"))
+    executor.execute(parse_statement("ANALYZE users"))
+    report = executor.catalog.get_table("users")["stats"]["bloom"]
+    assert report["fp_rate"] == 0.01 and report["keys"] == 101 + MIN_BLOOM_KEYS
+    assert 0 < report["estimated_fp_rate"] < 0.01
+    assert executor.catalog.blooms["users"].meta["keys"] == 100 + MIN_BLOOM_KEYS
+
+    executor.close()
+    if os.path.exists(db_file):
+        os.remove(db_file)
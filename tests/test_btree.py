@@ -2,6 +2,7 @@
 Test for the BTree.
 """
 import os
+import random
 from core.pager import Pager
 from core.btree import BTree
 
@@ -74,11 +75,90 @@ def test_btree_split():
     assert len(rows) == 200
     for i, row in enumerate(rows):
         assert row["id"] == i + 1
+
+    rows = list(btree.traverse(reverse=True))
+    assert [row["id"] for row in rows] == list(range(200, 0, -1))
+
+    # Bounded traversal only returns keys inside the range
+    rows = list(btree.traverse(low=95, high=105))
+    assert [row["id"] for row in rows] == list(range(95, 106))
+    rows = list(btree.traverse(reverse=True, high=3))
+    assert [row["id"] for row in rows] == [3, 2, 1]
         
     pager.close()
     if os.path.exists(db_file):
         os.remove(db_file)
 
+def test_btree_update():
+    db_file = "test_btree_update.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    pager = Pager(db_file)
+    btree = BTree(pager)
+    for i in range(1, 101):
+        btree.insert(i, {"id": i, "name": f"person_{i}"})
+
+    # Same-size, smaller and much bigger payloads
+    assert btree.update(50, {"id": 50, "name": "renamed__"})
+    assert btree.update(51, {"id": 51})
+    assert btree.update(52, {"id": 52, "name": "x" * 1000})
+    assert not btree.update(500, {"id": 500})
+
+    assert btree.search(50) == {"id": 50, "name": "renamed__"}
+    assert btree.search(51) == {"id": 51}
+    assert btree.search(52) == {"id": 52, "name": "x" * 1000}
+    assert [row["id"] for row in btree.traverse()] == list(range(1, 101))
+
+    pager.close()
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+def test_btree_delete_merges_and_frees_pages():
+    db_file = "test_btree_delete.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    pager = Pager(db_file)
+    btree = BTree(pager)
+    # Tiny internal nodes so a few hundred rows build a multi-level tree
+    btree.internal_max_cells = 4
+
+    keys = list(range(1, 601))
+    random.Random(7).shuffle(keys)
+    for key in keys:
+        btree.insert(key, {"id": key, "padding": "x" * 40})
+    assert btree.depth() >= 3
+    assert [row["id"] for row in btree.traverse()] == list(range(1, 601))
+    pages_before = len(list(btree.walk_pages()))
+
+    # Delete most rows; leaves merge and emptied pages go back to the pager
+    for key in keys[:550]:
+        assert btree.delete(key)
+    assert not btree.delete(keys[0])
+
+    remaining = sorted(keys[550:])
+    assert [row["id"] for row in btree.traverse()] == remaining
+    for key in remaining:
+        assert btree.search(key)["id"] == key
+    assert btree.search(keys[0]) is None
+
+    pages_after = len(list(btree.walk_pages()))
+    assert pages_after < pages_before / 5
+    assert len(pager.free_pages) == pages_before - pages_after
+
+    # New nodes reuse freed pages instead of growing the file
+    num_pages = pager.num_pages
+    for key in keys[:200]:
+        btree.insert(key, {"id": key, "padding": "x" * 40})
+    assert pager.num_pages == num_pages
+
+    pager.close()
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
 if __name__ == "__main__":
     test_btree_insert_and_search()
     test_btree_split()
+    test_btree_update()
+    test_btree_delete_merges_and_frees_pages()
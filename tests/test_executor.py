@@ -49,3 +49,198 @@ def test_executor_insert_and_select():
     
     if os.path.exists(db_file):
         os.remove(db_file)
+
+def test_executor_order_by():
+    db_file = "test_executor_order.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    executor = Executor(db_file, sort_memory_budget=512)
+    executor.execute(parse_statement("CREATE TABLE users (id, name, age)"))
+    executor.execute(parse_statement("CREATE TABLE pets (id, name)"))
+    ages = [40, 25, 33, 25, 61, 18]
+    for i, age in enumerate(ages, start=1):
+        executor.execute(parse_statement(f"INSERT INTO users VALUES ({i}, 'user_{i}', {age})"))
+    executor.execute(parse_statement("INSERT INTO pets VALUES (1, 'rex')"))
+
+    # Tables live in their own trees
+    assert executor.execute(parse_statement("SELECT * FROM pets")) == [{"values": [1, "rex"]}]
+
+    rows = executor.execute(parse_statement("SELECT * FROM users ORDER BY age"))
+    assert [row["values"][2] for row in rows] == sorted(ages)
+
+    rows = executor.execute(parse_statement("SELECT * FROM users ORDER BY age DESC LIMIT 2"))
+    assert [row["values"][2] for row in rows] == [61, 40]
+
+    # Primary key order comes straight from the tree
+    rows = executor.execute(parse_statement("SELECT * FROM users ORDER BY id DESC LIMIT 3"))
+    assert [row["values"][0] for row in rows] == [6, 5, 4]
+
+    assert executor.execute(parse_statement("SELECT * FROM users ORDER BY height")).startswith("Error")
+    assert executor.execute(parse_statement("SELECT * FROM missing")).startswith("Error")
+    executor.close()
+
+    # The schema survives a reopen
+    executor = Executor(db_file)
+    rows = executor.execute(parse_statement("SELECT * FROM users ORDER BY name LIMIT 1"))
+    assert rows == [{"values": [1, "user_1", 40]}]
+    executor.close()
+
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+def test_executor_rejects_pre_catalog_database():
+    db_file = "test_executor_old.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    # The original layout: user rows in a single tree rooted at page 0
+    from core.btree import BTree
+    from core.pager import Pager
+    pager = Pager(db_file)
+    BTree(pager).insert(1, {"values": [1, "Alice", 25]})
+    pager.close()
+
+    with pytest.raises(ValueError, match="predates the catalog"):
+        Executor(db_file)
+    os.remove(db_file)
+
+def test_executor_join():
+    db_file = "test_executor_join.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    executor = Executor(db_file)
+    executor.execute(parse_statement("CREATE TABLE users (id, name)"))
+    executor.execute(parse_statement("CREATE TABLE orders (id, user_id, total)"))
+    for i, name in [(1, "alice"), (2, "bob"), (3, "carol")]:
+        executor.execute(parse_statement(f"INSERT INTO users VALUES ({i}, '{name}')"))
+    for i, user_id, total in [(10, 2, 5), (11, 1, 7), (12, 2, 3), (13, 9, 1)]:
+        executor.execute(parse_statement(f"INSERT INTO orders VALUES ({i}, {user_id}, {total})"))
+
+    # users.id is a primary key, so stream orders and probe the users tree
+    sql = "SELECT * FROM users JOIN orders ON users.id = orders.user_id"
+    plan = executor.execute(parse_statement("EXPLAIN " + sql))
+    assert plan[0] == {"values": ["INDEX NESTED LOOP JOIN"]}
+    rows = executor.execute(parse_statement(sql))
+    assert rows == [
+        {"values": [2, "bob", 10, 2, 5]},
+        {"values": [1, "alice", 11, 1, 7]},
+        {"values": [2, "bob", 12, 2, 3]},
+    ]
+
+    # Narrowing users to one row by WHERE makes it the hash join's build side
+    sql = "SELECT * FROM users JOIN orders ON users.id = orders.user_id WHERE users.id = 2 ORDER BY total"
+    plan = executor.execute(parse_statement("EXPLAIN " + sql))
+    assert plan[0]["values"][0].startswith("HASH JOIN")
+    assert plan[1] == {"values": ["  BUILD: SEARCH users USING PRIMARY KEY (=2)"]}
+    rows = executor.execute(parse_statement(sql))
+    assert [row["values"][2] for row in rows] == [12, 10]
+
+    assert executor.execute(parse_statement("SELECT * FROM users JOIN orders ON users.id = orders.user_id ORDER BY id")).startswith("Error: Ambiguous")
+    executor.close()
+
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+def test_executor_analyze_and_access_paths():
+    db_file = "test_executor_analyze.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    executor = Executor(db_file)
+    executor.execute(parse_statement("CREATE TABLE users (id, name, age)"))
+    for i in range(1, 301):
+        executor.execute(parse_statement(f"INSERT INTO users VALUES ({i}, 'user_{i}', {i % 50})"))
+
+    # Filters on any column, and primary key ranges that seek instead of scanning
+    rows = executor.execute(parse_statement("SELECT * FROM users WHERE id > 100 AND id <= 110 AND age >= 5"))
+    assert [row["values"][0] for row in rows] == [105, 106, 107, 108, 109, 110]
+    rows = executor.execute(parse_statement("SELECT * FROM users WHERE age = 7 ORDER BY id DESC"))
+    assert [row["values"][0] for row in rows] == [257, 207, 157, 107, 57, 7]
+
+    sql = "SELECT * FROM users WHERE id > 100 AND id <= 110"
+    plan = executor.execute(parse_statement("EXPLAIN " + sql))
+    assert plan == [{"values": ["SEARCH users USING PRIMARY KEY RANGE (101 <= id <= 110)"]}]
+
+    # Negative and decimal literals compare as numbers, on key ranges and on filters
+    rows = executor.execute(parse_statement("SELECT * FROM users WHERE id > 297.5"))
+    assert [row["values"][0] for row in rows] == [298, 299, 300]
+    assert len(executor.execute(parse_statement("SELECT * FROM users WHERE id > -1"))) == 300
+    assert executor.execute(parse_statement("SELECT * FROM users WHERE id < -1")) == []
+    plan = executor.execute(parse_statement("EXPLAIN SELECT * FROM users WHERE id > 2.5 AND id < 5.5"))
+    assert plan == [{"values": ["SEARCH users USING PRIMARY KEY RANGE (3 <= id <= 5)"]}]
+    assert len(executor.execute(parse_statement("SELECT * FROM users WHERE age > -1"))) == 300
+    rows = executor.execute(parse_statement("SELECT * FROM users WHERE age < 0.5 AND id <= 100"))
+    assert [row["values"][0] for row in rows] == [50, 100]
+    plan = executor.execute(parse_statement("EXPLAIN SELECT * FROM users WHERE age > 2.5"))
+    assert plan == [{"values": ["SCAN users FILTER age > 2.5"]}]
+    assert executor.execute(parse_statement("INSERT INTO users VALUES (-5, 'neg', 1)")).startswith("Error")
+
+    assert executor.execute(parse_statement("ANALYZE users")) == "Analyzed 1 table(s)."
+    stats = executor.catalog.get_table("users")["stats"]
+    assert stats["row_count"] == 300
+    assert 45 <= stats["columns"]["age"]["distinct"] <= 55
+
+    # With statistics, EXPLAIN shows row estimates
+    plan = executor.execute(parse_statement("EXPLAIN " + sql))
+    assert plan[0]["values"][0].startswith("SEARCH users USING PRIMARY KEY RANGE (101 <= id <= 110) (~")
+    executor.close()
+
+    # Statistics are persisted in the catalog
+    executor = Executor(db_file)
+    assert executor.catalog.get_table("users")["stats"]["row_count"] == 300
+    executor.close()
+
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+def test_executor_update_and_delete():
+    db_file = "test_executor_update.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    executor = Executor(db_file)
+    executor.execute(parse_statement("CREATE TABLE users (id, name, age)"))
+    for i in range(1, 201):
+        executor.execute(parse_statement(f"INSERT INTO users VALUES ({i}, 'user_{i}', {i % 10})"))
+
+    assert executor.execute(parse_statement("UPDATE users SET name = 'bob' WHERE id = 5")) == "Updated 1 row(s) in users."
+    assert executor.execute(parse_statement("SELECT * FROM users WHERE id = 5")) == [{"values": [5, "bob", 5]}]
+
+    # Moving a row to a new primary key
+    executor.execute(parse_statement("UPDATE users SET id = 500 WHERE id = 5"))
+    assert executor.execute(parse_statement("SELECT * FROM users WHERE id = 5")) == []
+    assert executor.execute(parse_statement("SELECT * FROM users WHERE id = 500")) == [{"values": [500, "bob", 5]}]
+    assert executor.execute(parse_statement("UPDATE users SET id = 6 WHERE id = 7")).startswith("Error")
+    assert executor.execute(parse_statement("UPDATE users SET height = 6")).startswith("Error")
+    # A row too big for one page is refused and the old one is kept
+    big = "x" * 5000
+    assert executor.execute(parse_statement(f"UPDATE users SET name = '{big}' WHERE id = 8")).startswith("Error")
+    assert executor.execute(parse_statement(f"INSERT INTO users VALUES (1000, '{big}', 0)")).startswith("Error")
+    assert executor.execute(parse_statement("SELECT * FROM users WHERE id = 8")) == [{"values": [8, "user_8", 8]}]
+
+    assert executor.execute(parse_statement("DELETE FROM users WHERE age = 3")) == "Deleted 20 row(s) from users."
+    assert executor.execute(parse_statement("DELETE FROM users WHERE id > 100 AND id <= 150")) == "Deleted 45 row(s) from users."
+    rows = executor.execute(parse_statement("SELECT * FROM users"))
+    assert len(rows) == 200 - 20 - 45
+    assert all(row["values"][2] != 3 for row in rows)
+
+    assert executor.execute(parse_statement("DELETE FROM users")) == "Deleted 135 row(s) from users."
+    assert executor.execute(parse_statement("SELECT * FROM users")) == []
+    executor.close()
+
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+def test_executor_refuses_unbound_params():
+    db_file = "test_executor_params.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    executor = Executor(db_file)
+    executor.execute(parse_statement("CREATE TABLE users (id, name)"))
+    result = executor.execute(parse_statement("SELECT * FROM users WHERE id = ?"))
+    assert result == "Error: Statement has unbound ? parameters."
+    executor.close()
+    os.remove(db_file)
@@ -0,0 +1,104 @@
+"""
+Tests for the database header: page size, free list and per-table metadata.
+"""
+import os
+import sys
+
+# Add the project directory to sys.path so we can import 'core' and 'sql'.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.parser import parse_statement
+from core.executor import Executor
+from core.header import HEADER_PAGES
+from core.pager import Pager
+
+def test_header_row_counts_and_page_size():
+    db_file = "test_header.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    executor = Executor(db_file, page_size=8192)
+    executor.execute(parse_statement("CREATE TABLE users (id, name)"))
+    for i in range(1, 601):
+        executor.execute(parse_statement(f"INSERT INTO users VALUES ({i}, 'user_{i}')"))
+    executor.execute(parse_statement("DELETE FROM users WHERE id <= 100"))
+    executor.execute(parse_statement("UPDATE users SET id = 5000 WHERE id = 600"))
+
+    assert executor.execute(parse_statement("SELECT COUNT(*) FROM users")) == [{"values": [500]}]
+    lines = [row["values"][0] for row in executor.execute(parse_statement("EXPLAIN SELECT COUNT(*) FROM users"))]
+    assert lines[0] == "READ ROW COUNT OF users FROM DATABASE HEADER"
+    # A WHERE clause still needs the rows themselves
+    assert executor.execute(parse_statement("SELECT COUNT(*) FROM users WHERE id > 599")) == [{"values": [1]}]
+    depth = executor.catalog.open_tree("users").depth()
+    assert depth > 1 and executor.catalog.table_depth("users") == depth
+    # A rewrite that changes neither the count nor the depth leaves the header alone
+    sequence = executor.pager.header.sequence
+    executor.execute(parse_statement("UPDATE users SET name = 'bob' WHERE id = 300"))
+    assert executor.pager.header.sequence == sequence
+    executor.close()
+    assert os.path.getsize(db_file) % 8192 == 0
+
+    # Reopening reads the page size and counts back from the header
+    executor = Executor(db_file)
+    assert executor.pager.page_size == 8192
+    assert executor.catalog.row_count("users") == 500
+    assert executor.catalog.table_depth("users") == depth
+    executor.close()
+
+    # Either copy of the header is enough: damage the newer one and the older one is used
+    pager = Pager(db_file)
+    sequence = pager.header.sequence
+    newer = sequence % HEADER_PAGES
+    pager.close()
+    with open(db_file, "r+b") as f:
+        f.seek(newer * 8192 + 100)
+        f.write(b"\xff" * 8)
+    pager = Pager(db_file)
+    assert pager.header.sequence == sequence - 1
+    pager.close()
+    os.remove(db_file)
+
+    # Compressed databases record their page size too
+    executor = Executor(db_file, compression="zlib", page_size=2048)
+    executor.execute(parse_statement("CREATE TABLE users (id, name)"))
+    for i in range(1, 201):
+        executor.execute(parse_statement(f"INSERT INTO users VALUES ({i}, 'user_{i}')"))
+    executor.close()
+    executor = Executor(db_file)
+    assert executor.pager.page_size == 2048 and executor.catalog.row_count("users") == 200
+    assert len(executor.execute(parse_statement("SELECT * FROM users"))) == 200
+    executor.close()
+    os.remove(db_file)
+
+    for page_size in (1000, 512, 1 << 20):
+        try:
+            Executor(db_file, page_size=page_size)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+def test_free_pages_survive_reopen():
+    db_file = "test_header_freelist.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    executor = Executor(db_file)
+    executor.execute(parse_statement("CREATE TABLE t (id, payload)"))
+    for i in range(1, 1501):
+        executor.execute(parse_statement(f"INSERT INTO t VALUES ({i}, '{'x' * 100}')"))
+    executor.execute(parse_statement("DELETE FROM t WHERE id > 100"))
+    freed = executor.pager.header.freelist_count
+    assert freed > 0
+    num_pages = executor.pager.num_pages
+    executor.close()
+
+    # Pages freed in the last session are handed out again before the file grows
+    executor = Executor(db_file)
+    assert executor.pager.header.freelist_count == freed
+    for i in range(101, 1501):
+        executor.execute(parse_statement(f"INSERT INTO t VALUES ({i}, '{'x' * 100}')"))
+    assert executor.pager.num_pages == num_pages
+    assert executor.execute(parse_statement("SELECT COUNT(*) FROM t")) == [{"values": [1500]}]
+    assert len(executor.execute(parse_statement("SELECT * FROM t"))) == 1500
+    executor.close()
+    os.remove(db_file)
@@ -0,0 +1,74 @@
+"""
+Tests for the network server, wire protocol and client.
+"""
+import asyncio
+import os
+import sys
+
+# Add the project directory to sys.path so we can import 'core', 'net' and 'sql'.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from core.executor import Executor
+from net import protocol
+from net.client import Connection, ConnectionPool, QueryError
+from net.server import Server
+
+def test_protocol_round_trip():
+    values = [None, True, False, 0, -5, 2 ** 70, 1.5, "", "héllo"]
+    encoded = protocol.encode_values(values)
+    assert protocol.decode_values(encoded) == (values, len(encoded))
+
+    rows = [{"values": [1, "a"]}, {"values": [2, None]}]
+    assert protocol.decode_rows(protocol.encode_rows(7, False, rows)) == (7, False, rows)
+    with pytest.raises(protocol.ProtocolError):
+        protocol.encode_values([[1, 2]])
+
+def test_server_and_client():
+    db_file = "test_net.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+    executor = Executor(db_file)
+
+    async def scenario():
+        server = Server(executor, port=0)
+        await server.start()
+        pool = ConnectionPool(port=server.port, size=2, fetch_size=7)
+        try:
+            assert await pool.query("CREATE TABLE users (id, name, age)") == "Table users created."
+
+            # Prepared once per connection, then pipelined
+            async with pool.connection() as connection:
+                statement = await connection.prepare("INSERT INTO users VALUES (?, ?, ?)")
+                assert statement.param_count == 3
+                results = await connection.execute_many(statement, [[i, f"user_{i}", 20 + i] for i in range(1, 51)])
+                assert results == ["Inserted 1 row into users."] * 50
+
+            # Results bigger than the fetch size come back over several batches
+            rows = await pool.query("SELECT * FROM users WHERE age > 30")
+            assert [row["values"][0] for row in rows] == list(range(11, 51))
+
+            # Concurrent tasks share the pool's connections
+            lookups = await asyncio.gather(*(pool.execute("SELECT * FROM users WHERE id = ?", [i]) for i in range(1, 21)))
+            assert [rows[0]["values"][1] for rows in lookups] == [f"user_{i}" for i in range(1, 21)]
+            assert len(pool._connections) == 2
+
+            # Errors are reported without dropping the connection
+            connection = await Connection.open(port=server.port)
+            with pytest.raises(QueryError):
+                await connection.query("SELEC nonsense")
+            with pytest.raises(QueryError):
+                await connection.execute("SELECT * FROM users WHERE id = ?", [])
+            with pytest.raises(QueryError):
+                await connection.query("SELECT * FROM missing")
+            assert await connection.query("SELECT COUNT(*) FROM users") == [{"values": [50]}]
+            await connection.close()
+        finally:
+            await pool.close()
+            await server.close()
+
+    asyncio.run(scenario())
+    executor.close()
+    if os.path.exists(db_file):
+        os.remove(db_file)
@@ -8,7 +8,8 @@ import sys
 # Add the project directory to sys.path so we can import 'core'.
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from core.pager import Pager
+from core.pager import MIN_HOT_PAGES, PAGE_SIZE, Pager
+from core.btree import BTree
 
 def test_pager_write_and_read():
     db_file = "test_mydb.db"
@@ -42,5 +43,102 @@ def test_pager_write_and_read():
     # Cleanup afterwards
     os.remove(db_file)
 
+def test_compressed_pages_and_cache_tiers():
+    db_file = "test_compressed.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    pager = Pager(db_file, compression="zlib")
+    # Far below the safe floor, which is fine when pages are only written one at a time
+    pager.cache_pages = 4
+    for page_num in range(20):
+        page = pager.get_page(page_num)
+        text = f"page {page_num} ".encode() * 100
+        page[:len(text)] = text
+        if page_num % 2 == 0:
+            pager.flush_page(page_num)
+
+    # Only the hot tier holds decompressed pages; evicted ones were written back
+    assert len(pager.pages) == 4
+    assert len(pager.cold_pages) == 16
+    assert pager.get_page(3)[:7] == b"page 3 "
+    assert 3 not in pager.cold_pages
+
+    # A page that no longer compresses moves to a bigger extent
+    pager.get_page(5)[:] = os.urandom(PAGE_SIZE)
+    pager.flush_page(5)
+    random_page = bytes(pager.get_page(5))
+    pager.close()
+    assert os.path.getsize(db_file) < 20 * PAGE_SIZE
+
+    # Reopening rebuilds the extent map; the compressor comes from the file itself
+    pager = Pager(db_file, read_only=True)
+    assert pager.compression == "zlib"
+    assert pager.num_pages == 20
+    assert pager.get_page(5) == random_page
+    for page_num in range(20):
+        if page_num != 5:
+            text = f"page {page_num} ".encode() * 100
+            assert pager.get_page(page_num)[:len(text)] == text
+    pager.close()
+
+    pager = Pager("test_mydb.db", compression="lzma")
+    pager.get_page(0)[:5] = b"hello"
+    pager.close()
+    pager = Pager("test_mydb.db")
+    assert pager.compression == "lzma" and pager.get_page(0)[:5] == b"hello"
+    pager.close()
+    raw = Pager(db_file + ".raw")
+    raw.get_page(0)
+    raw.close()
+    # An unknown compressor, or asking to compress a file that is already stored raw
+    for filename, compression in (("test_mydb.db", "bogus"), (db_file + ".raw", "zlib")):
+        try:
+            Pager(filename, compression=compression)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+    os.remove(db_file + ".raw")
+
+    # At 64KB an incompressible page is stored raw, longer than the extent's length field can say
+    os.remove(db_file)
+    pager = Pager(db_file, compression="zlib", page_size=65536)
+    pager.get_page(0)[:] = random_page = os.urandom(65536)
+    pager.get_page(1)[:5] = b"hello"
+    pager.close()
+    pager = Pager(db_file)
+    assert pager.page_size == 65536
+    assert pager.get_page(0) == random_page and pager.get_page(1)[:5] == b"hello"
+    pager.close()
+    os.remove(db_file)
+    os.remove("test_mydb.db")
+
+def test_btree_on_smallest_hot_cache():
+    db_file = "test_hot_floor.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    try:
+        Pager(db_file, compression="zlib", cache_pages=MIN_HOT_PAGES - 1)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+    # Enough rows to split internal nodes, with most pages evicted along the way
+    pager = Pager(db_file, compression="zlib", cache_pages=MIN_HOT_PAGES)
+    btree = BTree(pager)
+    for i in range(1, 5001):
+        btree.insert(i, {"values": [i, "r" * 400]})
+    for i in range(1, 5001, 3):
+        btree.delete(i)
+    assert btree.depth() == 3
+    pager.close()
+
+    pager = Pager(db_file)
+    keys = [row["values"][0] for row in BTree(pager).traverse()]
+    assert keys == [i for i in range(1, 5001) if i % 3 != 1]
+    pager.close()
+    os.remove(db_file)
+
 if __name__ == "__main__":
     test_pager_write_and_read()
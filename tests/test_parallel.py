@@ -0,0 +1,51 @@
+"""
+Test for the parallel scan.
+"""
+import os
+import sys
+
+# Add the project directory to sys.path so we can import 'core' and 'sql'.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.parser import parse_statement
+from core.executor import Executor
+from core.parallel import split_ranges
+
+def test_parallel_scan_matches_serial():
+    db_file = "test_parallel.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    executor = Executor(db_file)
+    executor.execute(parse_statement("CREATE TABLE items (id, bucket, label)"))
+    for i in range(1, 1501):
+        executor.execute(parse_statement(f"INSERT INTO items VALUES ({i}, {i % 7}, 'label_{i:05}')"))
+    executor.close()
+
+    queries = [
+        "SELECT * FROM items WHERE bucket = 3",
+        "SELECT * FROM items WHERE id >= 200 AND id < 1200 ORDER BY id DESC",
+        "SELECT * FROM items WHERE bucket > 4 ORDER BY label DESC",
+        "SELECT COUNT(*), SUM(bucket), AVG(bucket), MIN(label), MAX(label) FROM items WHERE bucket != 0",
+    ]
+    serial = Executor(db_file)
+    parallel = Executor(db_file, parallelism=3)
+
+    # The table is split into three contiguous key ranges
+    runs = split_ranges(parallel.catalog.open_tree("items"), 3)
+    assert len(runs) == 3
+    explained = parallel.execute(parse_statement("EXPLAIN " + queries[0]))
+    assert {"values": ["SPLIT INTO KEY RANGES FOR UP TO 3 WORKER PROCESSES"]} in explained
+
+    for sql in queries:
+        stmt = parse_statement(sql)
+        assert parallel.execute(stmt) == serial.execute(stmt)
+
+    count, total, avg, smallest, largest = parallel.execute(parse_statement(queries[3]))[0]["values"]
+    assert count == 1500 - 214
+    assert smallest == "label_00001" and largest == "label_01500"
+
+    serial.close()
+    parallel.close()
+    if os.path.exists(db_file):
+        os.remove(db_file)
@@ -1,6 +1,7 @@
 """
 Test for the Parser.
 """
+import json
 import os
 import sys
 
@@ -8,7 +9,7 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import pytest
-from sql.parser import parse_statement
+from sql.parser import PLACEHOLDER, bind_params, count_params, parse_statement
 
 def test_parse_create_table():
     sql = "CREATE TABLE users (id, name, age)"
@@ -36,7 +37,7 @@ def test_parse_insert():
     stmt2 = parse_statement(sql2)
     assert stmt2["type"] == "INSERT"
     assert stmt2["table"] == "my_table"
-    assert stmt2["values"] == ["-5", "bob smith", 0] # Note: negative numbers not handled currently by isdigit() but good enough for MVP
+    assert stmt2["values"] == [-5, "bob smith", 0]
 
 def test_parse_select_all():
     sql = "SELECT * FROM users"
@@ -65,3 +66,79 @@ def test_parse_invalid():
         
     with pytest.raises(ValueError):
         parse_statement("SELECT id, name FROM users") # Only supports SELECT * for MVP
+
+def test_parse_select_order_by_limit():
+    stmt = parse_statement("SELECT * FROM users ORDER BY age DESC LIMIT 5")
+    assert stmt["where"] is None
+    assert stmt["order_by"] == {"col": "age", "desc": True}
+    assert stmt["limit"] == 5
+
+    stmt2 = parse_statement("select * from users where id = 3 order by name")
+    assert stmt2["where"] == {"col": "id", "op": "=", "val": 3}
+    assert stmt2["order_by"] == {"col": "name", "desc": False}
+    assert stmt2["limit"] is None
+
+def test_parse_join_and_explain():
+    stmt = parse_statement("SELECT * FROM users JOIN orders ON orders.user_id = users.id ORDER BY orders.total")
+    assert stmt["table"] == "users"
+    assert stmt["join"] == {"table": "orders", "left_col": "id", "right_col": "user_id"}
+    assert stmt["order_by"] == {"col": "orders.total", "desc": False}
+
+    explained = parse_statement("EXPLAIN SELECT * FROM users WHERE id = 1")
+    assert explained["type"] == "EXPLAIN"
+    assert explained["stmt"]["where"] == {"col": "id", "op": "=", "val": 1}
+
+    with pytest.raises(ValueError):
+        parse_statement("SELECT * FROM users JOIN orders ON pets.id = orders.user_id")
+
+def test_parse_where_conditions_and_analyze():
+    stmt = parse_statement("SELECT * FROM users WHERE id >= 10 AND age <> 3 and name = 'bo'")
+    assert stmt["where"] == {"op": "AND", "conds": [
+        {"col": "id", "op": ">=", "val": 10},
+        {"col": "age", "op": "!=", "val": 3},
+        {"col": "name", "op": "=", "val": "bo"},
+    ]}
+    stmt = parse_statement("SELECT * FROM users WHERE age > -1 AND score < 25.5 AND x = 1e3 AND y = 1.2.3")
+    assert [cond["val"] for cond in stmt["where"]["conds"]] == [-1, 25.5, 1000.0, "1.2.3"]
+    assert parse_statement("INSERT INTO t VALUES (+3, -0.5, .5)")["values"] == [3, -0.5, 0.5]
+
+    assert parse_statement("ANALYZE") == {"type": "ANALYZE", "table": None}
+    assert parse_statement("analyze users") == {"type": "ANALYZE", "table": "users"}
+
+    with pytest.raises(ValueError):
+        parse_statement("SELECT * FROM users WHERE age")
+
+def test_parse_delete_and_update():
+    stmt = parse_statement("DELETE FROM users WHERE age < 18")
+    assert stmt == {"type": "DELETE", "table": "users", "where": {"col": "age", "op": "<", "val": 18}}
+
+    stmt = parse_statement("UPDATE users SET name = 'bob', age = 30 WHERE id = 2")
+    assert stmt["type"] == "UPDATE"
+    assert stmt["set"] == {"name": "bob", "age": 30}
+    assert stmt["where"] == {"col": "id", "op": "=", "val": 2}
+
+def test_parse_aggregates():
+    stmt = parse_statement("SELECT COUNT(*), sum(age) FROM users WHERE age > 3")
+    assert stmt["aggregates"] == [{"func": "COUNT", "col": "*"}, {"func": "SUM", "col": "age"}]
+    assert parse_statement("SELECT * FROM users")["aggregates"] is None
+
+    with pytest.raises(ValueError):
+        parse_statement("SELECT SUM(*) FROM users")
+
+def test_parse_and_bind_params():
+    stmt = parse_statement("UPDATE users SET name = ? WHERE id = ? AND tag = '?'")
+    assert stmt["set"]["name"] is PLACEHOLDER
+    assert count_params(stmt) == 2
+    # Unbound parameters still serialize, e.g. in the web UI's step details
+    assert json.loads(json.dumps(stmt))["set"]["name"] == "?"
+
+    bound = bind_params(stmt, ["bob", 7])
+    assert bound["set"] == {"name": "bob"}
+    assert bound["where"]["conds"][0]["val"] == 7
+    # A quoted '?' is just a string
+    assert bound["where"]["conds"][1]["val"] == "?"
+    assert count_params(bound) == 0 and count_params(stmt) == 2
+
+    assert bind_params(parse_statement("INSERT INTO users VALUES (?, ?)"), [1, None])["values"] == [1, None]
+    with pytest.raises(ValueError):
+        bind_params(stmt, [1])
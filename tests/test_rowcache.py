@@ -0,0 +1,92 @@
+"""
+Tests for the row cache in front of primary key lookups.
+"""
+import os
+import sys
+
+# Add the project directory to sys.path so we can import 'core' and 'sql'.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sql.parser import parse_statement
+from core.executor import Executor
+from core.rowcache import RowCache
+from core.serializer import estimate_row_size
+
+class CountingTree:
+    def __init__(self, rows):
+        self.rows = rows
+        self.searches = 0
+
+    def search(self, key):
+        self.searches += 1
+        return self.rows.get(key)
+
+def test_row_cache_lru():
+    tree = CountingTree({i: {"values": [i, f"v{i}"]} for i in range(10)})
+    row_size = estimate_row_size(tree.rows[1])
+    cache = RowCache(capacity=3 * row_size)
+    for key in (1, 2, 3, 1, 4, 1, 2):
+        assert cache.search("t", tree, key) == {"values": [key, f"v{key}"]}
+
+    # 2 was the least recently used when 4 came in, so it had to be read again
+    assert tree.searches == 5
+    assert cache.stats() == {"hits": 2, "misses": 5, "hit_rate": 2 / 7, "evictions": 2,
+                             "rows": 3, "bytes": 3 * row_size, "capacity": 3 * row_size}
+
+    # Callers get copies, so changing a result can't corrupt the cache
+    cache.search("t", tree, 1)["values"][1] = "changed"
+    assert cache.search("t", tree, 1)["values"][1] == "v1"
+    assert cache.search("t", tree, 99) is None and cache.search("other", tree, 1) is not None
+    assert RowCache(capacity=0).search("t", tree, 1) is not None
+
+    # The budget is in bytes: a wide row pushes out several narrow ones, and one
+    # bigger than the whole cache isn't kept at all
+    cache = RowCache(capacity=10 * row_size)
+    for key in range(8):
+        cache.search("t", tree, key)
+    tree.rows[100] = {"values": [100, "w" * (5 * row_size)]}
+    cache.search("t", tree, 100)
+    assert cache.stats()["rows"] < 8 and cache.stats()["bytes"] <= 10 * row_size
+    tree.rows[101] = {"values": [101, "w" * (20 * row_size)]}
+    cache.search("t", tree, 101)
+    assert cache.search("t", tree, 100) is not None and cache.stats()["evictions"] == 4
+    searches = tree.searches
+    cache.search("t", tree, 101)
+    assert tree.searches == searches + 1
+
+def test_executor_keeps_row_cache_current():
+    db_file = "test_rowcache.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    executor = Executor(db_file, row_cache_bytes=64 * 1024)
+    executor.execute(parse_statement("CREATE TABLE users (id, name)"))
+    executor.execute(parse_statement("CREATE TABLE orders (id, user_id)"))
+    for i in range(1, 21):
+        executor.execute(parse_statement(f"INSERT INTO users VALUES ({i}, 'user_{i}')"))
+        executor.execute(parse_statement(f"INSERT INTO orders VALUES ({i}, {i % 3 + 1})"))
+
+    lookup = parse_statement("SELECT * FROM users WHERE id = 5")
+    for _ in range(4):
+        assert executor.execute(lookup) == [{"values": [5, "user_5"]}]
+    assert executor.row_cache.stats()["hits"] == 3
+
+    executor.execute(parse_statement("UPDATE users SET name = 'bob' WHERE id = 5"))
+    assert executor.execute(lookup) == [{"values": [5, "bob"]}]
+    executor.execute(parse_statement("UPDATE users SET id = 50 WHERE id = 5"))
+    assert executor.execute(lookup) == []
+    assert executor.execute(parse_statement("SELECT * FROM users WHERE id = 50")) == [{"values": [50, "bob"]}]
+    executor.execute(parse_statement("DELETE FROM users WHERE id = 50"))
+    assert executor.execute(parse_statement("SELECT * FROM users WHERE id = 50")) == []
+    executor.execute(parse_statement("INSERT INTO users VALUES (5, 'again')"))
+    assert executor.execute(lookup) == [{"values": [5, "again"]}]
+
+    # Index nested loop joins probe through the cache too
+    hits = executor.row_cache.stats()["hits"]
+    joined = executor.execute(parse_statement("SELECT * FROM orders JOIN users ON orders.user_id = users.id"))
+    assert len(joined) == 20
+    assert executor.row_cache.stats()["hits"] >= hits + 17
+
+    executor.close()
+    if os.path.exists(db_file):
+        os.remove(db_file)
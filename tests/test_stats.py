@@ -0,0 +1,72 @@
+"""
+Test for table statistics.
+"""
+import os
+import sys
+
+# Add the project directory to sys.path so we can import 'core'.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.pager import Pager
+from core.btree import BTree
+from core.stats import HyperLogLog, analyze_table, selectivity
+
+def test_hyperloglog_estimate():
+    for n in (10, 1000, 20000):
+        hll = HyperLogLog()
+        for i in range(n):
+            hll.add(i)
+            hll.add(i)  # duplicates don't count
+        assert abs(hll.estimate() - n) <= n * 0.1
+
+def test_analyze_table():
+    db_file = "test_stats.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    pager = Pager(db_file)
+    btree = BTree(pager)
+    for i in range(1, 1001):
+        btree.insert(i, {"values": [i, i % 20, f"name_{i}"]})
+
+    stats = analyze_table(btree, ["id", "bucket", "name"], sample_pages=4)
+    assert stats["row_count"] == 1000
+    assert stats["page_count"] == len(list(btree.walk_pages()))
+    assert stats["depth"] == 2
+    assert stats["sampled_rows"] < 1000
+
+    columns = stats["columns"]
+    # Unique columns are scaled up from the sample, low-cardinality ones are not
+    assert 850 <= columns["id"]["distinct"] <= 1000
+    assert 18 <= columns["bucket"]["distinct"] <= 22
+    assert columns["name"]["histogram"] is None
+    assert 0.3 <= selectivity(stats, "id", "<", 500) <= 0.7
+
+    pager.close()
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+def test_analyze_wide_table_keeps_catalog_row():
+    from sql.parser import parse_statement
+    from core.executor import Executor
+
+    db_file = "test_stats_wide.db"
+    for num_columns, page_size in ((40, 4096), (8, 1024)):
+        if os.path.exists(db_file):
+            os.remove(db_file)
+        executor = Executor(db_file, page_size=page_size)
+        columns = ", ".join(f"c{i}" for i in range(num_columns))
+        executor.execute(parse_statement(f"CREATE TABLE wide ({columns})"))
+        for key in range(1, 21):
+            values = ", ".join(str(key * 1000003 + i) for i in range(1, num_columns))
+            executor.execute(parse_statement(f"INSERT INTO wide VALUES ({key}, {values})"))
+
+        # Statistics too big for the catalog row are stored coarser instead
+        assert executor.execute(parse_statement("ANALYZE wide")) == "Analyzed 1 table(s)."
+        assert executor.catalog.get_table("wide")["stats"]["row_count"] == 20
+        executor.close()
+
+        executor = Executor(db_file)
+        assert len(executor.execute(parse_statement("SELECT * FROM wide"))) == 20
+        executor.close()
+    os.remove(db_file)
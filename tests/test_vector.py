@@ -0,0 +1,70 @@
+"""
+Tests for the vectorized batch scan.
+"""
+import os
+import sys
+
+# Add the project directory to sys.path so we can import 'core' and 'sql'.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from sql.parser import parse_statement
+from core.aggregate import aggregate_rows
+from core.executor import Executor
+from core.predicate import row_matches
+from core.vector import accumulate_batch, filter_mask, to_columns
+
+def test_batches_match_row_at_a_time():
+    rows = [{"values": [i, i % 5, f"name_{i}" if i % 3 else 10 + i]} for i in range(1, 301)]
+    columns = to_columns(rows, 3)
+    assert columns[1].dtype == np.int64
+    assert columns[2].dtype == object
+
+    aggregates = [{"func": func, "col": "x", "col_index": col_index}
+                  for func in ("COUNT", "SUM", "AVG", "MIN", "MAX") for col_index in (1, 2)]
+    aggregates.append({"func": "COUNT", "col": "*", "col_index": None})
+    filter_sets = [
+        [],
+        [{"col_index": 1, "op": ">=", "val": 2}],
+        [{"col_index": 1, "op": "<", "val": "text"}],
+        [{"col_index": 2, "op": ">", "val": 100}, {"col_index": 0, "op": "!=", "val": 7}],
+    ]
+    for filters in filter_sets:
+        mask = filter_mask(columns, filters, len(rows))
+        assert mask.tolist() == [row_matches(row, filters) for row in rows]
+
+        states = [[0, 0, None, None] for _ in aggregates]
+        accumulate_batch(states, aggregates, columns, mask)
+        assert states == aggregate_rows([row for row in rows if row_matches(row, filters)], aggregates)
+
+def test_executor_column_scan():
+    db_file = "test_vector.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    executor = Executor(db_file)
+    executor.execute(parse_statement("CREATE TABLE readings (id, sensor, value)"))
+    for i in range(1, 1001):
+        executor.execute(parse_statement(f"INSERT INTO readings VALUES ({i}, 's{i % 4}', {i * 3})"))
+
+    # Aggregates over one table are evaluated over column batches
+    sql = "SELECT COUNT(*), SUM(value), MIN(sensor) FROM readings WHERE id > 100 AND value < 2000"
+    explained = executor.execute(parse_statement("EXPLAIN " + sql))
+    assert {"values": ["AGGREGATE COUNT(*), SUM(value), MIN(sensor) OVER COLUMN BATCHES"]} in explained
+    expected = [i * 3 for i in range(101, 1001) if i * 3 < 2000]
+    assert executor.execute(parse_statement(sql)) == [{"values": [len(expected), sum(expected), "s0"]}]
+
+    where = parse_statement("SELECT * FROM readings WHERE id > 10 AND sensor = 's1'")["where"]
+    batches = list(executor.scan_columns("readings", where, batch_size=64))
+    assert all(len(batch["id"]) <= 64 for batch in batches)
+    ids = np.concatenate([batch["id"] for batch in batches])
+    assert ids.tolist() == [i for i in range(11, 1001) if i % 4 == 1]
+    assert batches[0]["value"].dtype == np.int64
+
+    single = list(executor.scan_columns("readings", parse_statement("SELECT * FROM readings WHERE id = 5")["where"]))
+    assert [batch["value"].tolist() for batch in single] == [[15]]
+
+    executor.close()
+    if os.path.exists(db_file):
+        os.remove(db_file)